@@ -0,0 +1,161 @@
+import datetime
+import json
+import time
+from pathlib import Path
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .instrumentation import percentile
+from .management.commands.generate_dataset import DEFAULT_ANCHOR_DATE, anchor_datetime
+from .models import Animal, Worker
+
+# Latency budgets are about three times the p95 last measured by `manage.py benchmark_views`
+# (15 ms at least, below which timings are mostly noise), so that a view that slows down with
+# the data fails instead of hiding under a generous limit. Lower them when a view gets faster.
+BUDGETS_PATH = Path(__file__).resolve().parent / "benchmark_budgets.json"
+
+
+def dataset_options(size):
+    """
+    The generate_dataset options for a benchmark of the given size. size is the number of
+    animals; everything else scales with it roughly the way it does in a real shelter.
+    """
+    return {
+        "shelters": max(1, size // 200),
+        "workers": max(5, size // 20),
+        "volunteers": max(5, size // 20),
+        "animals": size,
+        "tasks": size * 10,
+        "comments": size * 2,
+        "seed": 42,
+        "anchor_date": DEFAULT_ANCHOR_DATE,
+        "verbosity": 0,
+    }
+
+
+def seed_dataset(size):
+    """Replaces the data in the current database with a generated dataset of the given size."""
+    call_command("generate_dataset", flush=True, **dataset_options(size))
+    for cache in caches.all():
+        cache.clear()
+
+
+def view_cases():
+    """
+    The hot views to benchmark, as (name, method, url, data) tuples. Built from the current
+    data, so call this after seed_dataset().
+    """
+    animal = Animal.objects.for_list().order_by("id").first()
+    worker = Worker.objects.for_list().order_by("id").first()
+    # The month around the day the generated dates are relative to
+    now = anchor_datetime(DEFAULT_ANCHOR_DATE)
+    month = {
+        "start": (now - datetime.timedelta(days=15)).isoformat(),
+        "end": (now + datetime.timedelta(days=15)).isoformat(),
+    }
+    adoption = {
+        "name": "Benchmark Adopter",
+        "phone_number": "555-123-4567",
+        "email": "adopter@example.com",
+        "address_one": "1700 Rowan Blvd.",
+        "address_two": "",
+        "city": "Glassboro",
+        "state": "NJ",
+        "postal": "08080",
+        "country": "US",
+    }
+    return [
+        ("worker_dash", "get", reverse("worker_dash"), {}),
+        ("animals", "get", reverse("animals"), {"color": "Black"}),
+        (
+            "filter_tasks",
+            "post",
+            reverse("filter_tasks"),
+            {"completion_status": "incomplete", "assignee": worker.pk},
+        ),
+        ("sort_tasks", "post", reverse("sort_tasks"), {"sort": "due_date"}),
+        ("get_tasks_for_calendar", "get", reverse("get_calendar_tasks"), month),
+        ("home", "get", reverse("home"), {}),
+        ("adoption", "post", reverse("adoption", args=[animal.pk]), adoption),
+    ]
+
+
+def logged_in_client():
+    """Returns a test Client logged in as a manager, so every dashboard view is reachable."""
+    manager = Worker.objects.for_list().filter(role=Worker.MANAGER).order_by("id").first()
+    if manager is None:
+        manager = Worker.objects.for_list().order_by("id").first()
+        Worker.objects.filter(pk=manager.pk).update(role=Worker.MANAGER)
+    client = Client()
+    client.get(reverse("login"), {"email": manager.email, "password": manager.password})
+    return client
+
+
+def measure_views(iterations):
+    """
+    Drives every view in view_cases() iterations times (after one warm-up request) and returns
+    {view name: {"queries": max queries, "latency_ms_p50": ..., "latency_ms_p95": ...}}.
+    """
+    client = logged_in_client()
+    results = {}
+    with override_settings(VIEW_METRICS_DIR=None):
+        for name, method, url, data in view_cases():
+            getattr(client, method)(url, data)
+            latencies = []
+            queries = 0
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, data)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{name} returned {response.status_code}")
+                queries = max(queries, len(captured))
+            results[name] = {
+                "queries": queries,
+                "latency_ms_p50": round(percentile(latencies, 0.50), 2),
+                "latency_ms_p95": round(percentile(latencies, 0.95), 2),
+            }
+    return results
+
+
+def run_benchmarks(sizes, iterations):
+    """Seeds and measures each dataset size in turn. Returns {size: measure_views() result}."""
+    results = {}
+    for size in sizes:
+        seed_dataset(size)
+        results[size] = measure_views(iterations)
+    return results
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_budgets(size, results, budgets):
+    """
+    Compares the results of one dataset size with the checked-in budgets and returns a list of
+    human readable violations (empty if everything is within budget). Query budgets apply to
+    every size, since the query count of a view must not grow with the data. Latency budgets
+    are per size; sizes without a latency budget are only checked for queries.
+    """
+    violations = []
+    latency_budgets = budgets["latency_ms_p95"].get(str(size), {})
+    for name, result in results.items():
+        query_budget = budgets["queries"].get(name)
+        if query_budget is not None and result["queries"] > query_budget:
+            violations.append(
+                f"{name} @ {size}: {result['queries']} queries (budget {query_budget})"
+            )
+        latency_budget = latency_budgets.get(name)
+        if latency_budget is not None and result["latency_ms_p95"] > latency_budget:
+            violations.append(
+                f"{name} @ {size}: p95 {result['latency_ms_p95']}ms (budget {latency_budget}ms)"
+            )
+    return violations
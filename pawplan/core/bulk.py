@@ -0,0 +1,192 @@
+from collections import defaultdict
+
+from django.db import connections, models, router
+from django.db.models import NOT_PROVIDED
+from django.utils import timezone
+from polymorphic.models import PolymorphicModel
+
+
+def bulk_create_inherited(objs, batch_size=None):
+    """
+    Bulk inserts instances of multi-table inherited models such as Dog, Cat, Turtle, Worker or
+    TaskComment, which Django's own bulk_create() refuses to handle. Each concrete class costs two
+    batched INSERTs (one for the parent table, one for the child table) no matter how many
+    instances are passed, instead of two INSERTs per instance with save(). The INSERTs are built
+    the same way as bulk_insert()'s, so the same field types are supported.
+
+    Only one level of inheritance is supported, which covers every model in this app. For
+    PolymorphicModel subclasses the polymorphic_ctype is filled in so the rows come back as the
+    right subclass. Like bulk_create(), this does not call save() or send model signals. The
+    primary keys are set on the passed instances.
+
+    Arguments:
+    objs: An iterable of unsaved model instances (they may be of different classes).
+    batch_size: The maximum number of rows per INSERT statement (optional).
+    """
+    objs = list(objs)
+    by_model = defaultdict(list)
+    for obj in objs:
+        by_model[type(obj)].append(obj)
+
+    for model, group in by_model.items():
+        parents = model._meta.get_parent_list()
+        if not parents:
+            model._base_manager.bulk_create(group, batch_size=batch_size)
+            continue
+        if len(parents) > 1:
+            raise ValueError(f"{model.__name__} has more than one level of inheritance.")
+
+        parent = parents[0]
+        ptr_field = model._meta.parents[parent]
+        using = router.db_for_write(model)
+
+        if issubclass(model, PolymorphicModel):
+            for obj in group:
+                obj.pre_save_polymorphic(using=using)
+
+        connection = connections[using]
+        if connection.features.can_return_rows_from_bulk_insert:
+            # The parent columns are read straight off the child instances
+            parent_fields = [f for f in parent._meta.concrete_fields if f is not parent._meta.pk]
+            pks = _insert_rows(connection, parent, group, parent_fields, batch_size)
+        else:
+            parent_objs = [
+                parent(**{field.attname: getattr(obj, field.attname) for field in parent._meta.concrete_fields})
+                for obj in group
+            ]
+            parent._base_manager.bulk_create(parent_objs, batch_size=batch_size)
+            pks = [parent_obj.pk for parent_obj in parent_objs]
+
+        for obj, pk in zip(group, pks):
+            setattr(obj, parent._meta.pk.attname, pk)
+            setattr(obj, ptr_field.attname, pk)
+
+        _insert_rows(connection, model, group, model._meta.local_concrete_fields, batch_size)
+
+        for obj in group:
+            obj._state.adding = False
+            obj._state.db = using
+
+    return objs
+
+
+# The field types bulk_insert() and bulk_create_inherited() can write (subclasses included, such
+# as EmailField, DateTimeField or OneToOneField). Their pre_save() only returns the value, apart
+# from auto_now/auto_now_add, which is handled here. Fields whose pre_save() does more, such as
+# FileField (which saves the file), and fields with a db_default are refused.
+SUPPORTED_FIELD_TYPES = (
+    models.BooleanField,
+    models.CharField,
+    models.DateField,
+    models.DecimalField,
+    models.FloatField,
+    models.ForeignKey,
+    models.IntegerField,
+    models.TextField,
+    models.TimeField,
+)
+
+
+def bulk_insert(objs, batch_size=None):
+    """
+    A leaner bulk_create() for large batches of new rows of one plain (non-inherited) model
+    with an auto-incrementing primary key, such as the tasks and task items created with every
+    intake. Django's bulk_create() spends most of its time compiling the INSERT (each field of
+    each row looks up the thread-local database connection), which dominates once an import
+    writes tens of thousands of rows. This prepares every value with the field's
+    get_db_prep_save() and the real connection and sends multi-row INSERT ... RETURNING
+    statements, setting the primary keys on objs.
+
+    Only the fields in SUPPORTED_FIELD_TYPES can be written (a ValueError names any other).
+    auto_now/auto_now_add fields are filled in like save() would, and foreign keys assigned an
+    object that was saved afterwards get its key. Falls back to bulk_create() on databases that
+    can't return the keys of a multi-row INSERT. Like bulk_create(), this does not call save()
+    or send model signals.
+
+    Arguments:
+    objs: A list of unsaved instances of the same model.
+    batch_size: The maximum number of rows per INSERT statement (optional).
+    """
+    if not objs:
+        return objs
+    model = type(objs[0])
+    using = router.db_for_write(model)
+    connection = connections[using]
+    if not connection.features.can_return_rows_from_bulk_insert:
+        return model._base_manager.bulk_create(objs, batch_size=batch_size)
+
+    opts = model._meta
+    fields = [field for field in opts.local_concrete_fields if field is not opts.pk]
+    now = timezone.now()
+    for field in fields:
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+            for obj in objs:
+                setattr(obj, field.attname, now)
+
+    for obj, pk in zip(objs, _insert_rows(connection, model, objs, fields, batch_size)):
+        obj.pk = pk
+        obj._state.adding = False
+        obj._state.db = using
+    return objs
+
+
+def _insert_rows(connection, model, objs, fields, batch_size=None):
+    """
+    Inserts the given fields of objs into model's table with multi-row INSERTs. If the primary
+    key isn't one of the fields, the statements return the new keys, which are returned in the
+    order of objs (the databases that support RETURNING on a multi-row INSERT keep that order).
+    """
+    for field in fields:
+        if not isinstance(field, SUPPORTED_FIELD_TYPES) or field.db_default is not NOT_PROVIDED:
+            raise ValueError(
+                f"{model.__name__}.{field.name} ({type(field).__name__}) can't be bulk inserted."
+            )
+        if field.is_relation:
+            _copy_related_keys(objs, field)
+
+    opts = model._meta
+    ops = connection.ops
+    returning = opts.pk not in fields
+    size = ops.bulk_batch_size(fields, objs)
+    if batch_size:
+        size = min(size, batch_size)
+    columns = ", ".join(ops.quote_name(field.column) for field in fields)
+    row_sql = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    suffix = f" RETURNING {ops.quote_name(opts.pk.column)}" if returning else ""
+    pks = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), size):
+            batch = objs[start:start + size]
+            params = []
+            for obj in batch:
+                for field in fields:
+                    params.append(field.get_db_prep_save(getattr(obj, field.attname), connection))
+            cursor.execute(
+                f"INSERT INTO {ops.quote_name(opts.db_table)} ({columns}) VALUES "
+                f"{', '.join([row_sql] * len(batch))}{suffix}",
+                params,
+            )
+            if returning:
+                pks.extend(pk for (pk,) in cursor.fetchall())
+    return pks
+
+
+def _copy_related_keys(objs, field):
+    """
+    Sets the key of the foreign key field on objs that were assigned a related object before it
+    was saved (such as a TaskItem created for a Task that is inserted first), like save() does.
+    """
+    for obj in objs:
+        if getattr(obj, field.attname) is not None:
+            continue
+        # With no key set this reads the assigned object, if any, without a query
+        related = getattr(obj, field.name)
+        if related is None:
+            continue
+        if getattr(related, field.target_field.attname) is None:
+            raise ValueError(
+                f"{type(obj).__name__}.{field.name} is set to an unsaved {type(related).__name__}."
+            )
+        # Assigning the object again copies its key and keeps it cached (setting the key alone
+        # would drop it)
+        setattr(obj, field.name, related)
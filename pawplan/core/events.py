@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from django.db import transaction
+
+# Seconds between keep-alive comments on an idle event stream, so proxies don't close it
+KEEPALIVE_INTERVAL = 15
+
+# Events buffered per subscriber; a dashboard that falls further behind misses the oldest ones
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe hub behind the dashboard event stream. Views and signal
+    receivers publish short event names (such as "task-12") from any thread; every connected
+    dashboard_events stream gets them on its own asyncio queue.
+
+    Only subscribers in the same server process see an event, so the ASGI server should run a
+    single worker process (the default for `uvicorn pawplan.asgi:application`).
+
+    Attributes:
+    subscribers: A set of (event loop, asyncio.Queue) pairs, one per open event stream.
+    lock: Guards subscribers, which is changed from the event loop and read from view threads.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        """Returns a new queue of event names. Must be called from the consuming event loop."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers = {entry for entry in self.subscribers if entry[1] is not queue}
+
+    def publish(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down; its stream's cleanup will unsubscribe it
+                pass
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+broker = EventBroker()
+
+
+def publish_on_commit(event):
+    """
+    Publishes event once the current transaction commits (immediately outside a transaction),
+    so a dashboard that refetches a card in response never reads the data before the change.
+    """
+    transaction.on_commit(lambda: broker.publish(event))
+
+
+def task_changed(task_id):
+    publish_on_commit(f"task-{task_id}")
+
+
+def animal_changed(animal_id):
+    publish_on_commit(f"animal-{animal_id}")
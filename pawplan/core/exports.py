@@ -0,0 +1,149 @@
+import csv
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+
+from .models import Animal, AnimalComment, Task, TaskComment, TaskItem
+
+# Rows fetched from the database per round trip. The rows of one chunk are also written out
+# together, so a chunk is the most an export holds in memory at any time.
+CHUNK_SIZE = 2000
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+class ExportSpec(namedtuple("ExportSpec", ["queryset", "fields", "shelter_field", "date_field"])):
+    """
+    Describes one exportable dataset.
+
+    Attributes:
+    queryset: A function returning the base queryset.
+    fields: The values() lookups written for every row, which are also the column names.
+    shelter_field: The lookup used by the shelter filter.
+    date_field: The lookup used by the date range filter. Comments only store a time of day, so
+        they are filtered by the date of the task or animal they belong to.
+    """
+
+
+EXPORTS = {
+    "animals": ExportSpec(
+        # type is "dog", "cat" or "turtle"; non_polymorphic() skips the upcast to those classes
+        lambda: Animal.objects.non_polymorphic().annotate(type=F("polymorphic_ctype__model")),
+        (
+            "id", "type", "name", "color", "sex", "age", "intake_type",
+            "intake_date", "ready_to_adopt", "shelter_id", "description",
+        ),
+        "shelter_id",
+        "intake_date",
+    ),
+    "tasks": ExportSpec(
+        lambda: Task.objects.all(),
+        (
+            "id", "title", "shelter_id", "animal_id", "assignee_id", "required_role",
+            "is_released", "due_date", "creation_datetime", "completion_datetime",
+            "items_total", "items_complete", "description",
+        ),
+        "shelter_id",
+        "creation_datetime",
+    ),
+    "task_items": ExportSpec(
+        lambda: TaskItem.objects.all(),
+        ("id", "task_id", "item_number", "is_complete", "text"),
+        "task__shelter_id",
+        "task__creation_datetime",
+    ),
+    "task_comments": ExportSpec(
+        lambda: TaskComment.objects.all(),
+        ("id", "task_id", "person_id", "timeStamp", "text"),
+        "task__shelter_id",
+        "task__creation_datetime",
+    ),
+    "animal_comments": ExportSpec(
+        lambda: AnimalComment.objects.all(),
+        ("id", "animal_id", "person_id", "timeStamp", "text"),
+        "animal__shelter_id",
+        "animal__intake_date",
+    ),
+}
+
+
+class Echo:
+    """A file-like object that hands back what is written to it, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(dataset, shelter=None, since=None, until=None):
+    """
+    Returns an iterator over the rows (as tuples in EXPORTS[dataset].fields order) of a dataset,
+    optionally limited to one shelter id and to a [since, until) datetime range. Rows come in
+    primary key order and are fetched CHUNK_SIZE at a time, so memory use doesn't depend on the
+    size of the export.
+    """
+    spec = EXPORTS[dataset]
+    rows = spec.queryset()
+    if shelter is not None:
+        rows = rows.filter(**{spec.shelter_field: shelter})
+    if since is not None:
+        rows = rows.filter(**{f"{spec.date_field}__gte": since})
+    if until is not None:
+        rows = rows.filter(**{f"{spec.date_field}__lt": until})
+    return rows.order_by("pk").values_list(*spec.fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_lines(dataset, fmt, **filters):
+    """
+    Yields a dataset as text in the given format ("csv", with a header row, or "jsonl", one
+    JSON object per line), one string per chunk of rows. filters are passed to export_rows().
+    """
+    fields = EXPORTS[dataset].fields
+    rows = export_rows(dataset, **filters)
+    if fmt == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for chunk in _chunks(rows):
+            yield "".join(writer.writerow(row) for row in chunk)
+    else:
+        encoder = DjangoJSONEncoder()
+        for chunk in _chunks(rows):
+            yield "".join(encoder.encode(dict(zip(fields, row))) + "\n" for row in chunk)
+
+
+async def _async_lines(lines):
+    # thread_sensitive keeps every step on the thread that owns the database cursor
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(lines, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def export_response(request, dataset, fmt, **filters):
+    """
+    Returns a StreamingHttpResponse that downloads a dataset. Under ASGI the lines are handed
+    over as an async iterator, since Django would otherwise read a synchronous one into memory
+    before sending it.
+    """
+    lines = export_lines(dataset, fmt, **filters)
+    if isinstance(request, ASGIRequest):
+        lines = _async_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
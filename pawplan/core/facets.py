@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Shelter
+
+FACETS_CACHE_KEY = "animal_facets"
+FACETS_CACHE_TIMEOUT = 60 * 60
+
+# Facet name (the query parameter used by the animal browser) -> column in the grouped rows
+FACET_COLUMNS = {
+    "location": "name",
+    "color": "animal__color",
+    "sex": "animal__sex",
+}
+
+
+def _facet_rows():
+    """
+    Returns one row per (shelter, color, sex) combination with the number of animals in it. The
+    rows come from a single grouped query (shelters without animals are included with a count of
+    0 so they still show up as a location) and are cached until an Animal or Shelter changes.
+    """
+    rows = cache.get(FACETS_CACHE_KEY)
+    if rows is None:
+        rows = list(
+            Shelter.objects.order_by()
+            .values(*FACET_COLUMNS.values())
+            .annotate(count=Count("animal"))
+        )
+        cache.set(FACETS_CACHE_KEY, rows, FACETS_CACHE_TIMEOUT)
+    return rows
+
+
+def animal_facets(selected=None):
+    """
+    Returns the options and counts for every facet of the animal browser as a dict of the form
+    {"location": [(option, count), ...], "color": [...], "sex": [...]}, with options sorted.
+
+    selected is a dict of facet name -> list of checked options. Each facet's counts are
+    computed for the current selection in the *other* facets, which is how the counts next to
+    the checkboxes stay meaningful when filters are combined. This is done in Python over the
+    cached rows, so it costs no extra queries.
+    """
+    selected = {name: values for name, values in (selected or {}).items() if values}
+    rows = _facet_rows()
+
+    facets = {}
+    for name, column in FACET_COLUMNS.items():
+        counts = {}
+        for row in rows:
+            option = row[column]
+            if option is None:
+                continue
+            matches = all(
+                row[FACET_COLUMNS[other]] in values
+                for other, values in selected.items()
+                if other != name and other in FACET_COLUMNS
+            )
+            counts[option] = counts.get(option, 0) + (row["count"] if matches else 0)
+        facets[name] = sorted(counts.items())
+    return facets
+
+
+def invalidate_animal_facets():
+    """Drops the cached facet rows. Called from signals whenever an Animal or Shelter changes."""
+    cache.delete(FACETS_CACHE_KEY)
@@ -1,4 +1,5 @@
 from django import forms
+from .media import render_in_background, set_animal_image, validate_image
 from .models import Task, AnimalComment, TaskComment, Animal, Worker
 
 
@@ -44,6 +45,13 @@ class TaskForm(forms.ModelForm):
 
 
 class AnimalForm(forms.ModelForm):
+    """
+    Adds or edits an animal. The image is either uploaded (stored locally, see core/media.py)
+    or given as a URL in the image field.
+    """
+
+    upload = forms.ImageField(required=False, label="Upload image")
+
     class Meta:
         model = Animal
         fields = [
@@ -59,6 +67,39 @@ class AnimalForm(forms.ModelForm):
             "shelter",
         ]
         widgets = {}
+        labels = {"image": "Image URL"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["image"].required = False
+        self.image_data = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get("upload")
+        if upload:
+            # Only checked here; the image is stored by save(), so an invalid form stores nothing
+            self.image_data = upload.read()
+            try:
+                validate_image(self.image_data)
+            except forms.ValidationError as error:
+                self.image_data = None
+                self.add_error("upload", error)
+        elif not cleaned_data.get("image"):
+            self.add_error("image", "Enter an image URL or upload an image.")
+        elif "image" in self.changed_data:
+            # The variants belong to the old image; ingest_images fetches the new one
+            self.instance.image_hash = ""
+        return cleaned_data
+
+    def save(self, commit=True):
+        stored_image = None
+        if self.image_data is not None:
+            stored_image = set_animal_image(self.instance, self.image_data)
+        animal = super().save(commit)
+        if commit and stored_image:
+            render_in_background(stored_image)
+        return animal
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,55 @@
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+# The cache alias {% cache %} uses when no "using" is given, which holds the rendered fragments
+FRAGMENT_CACHE = "template_fragments"
+
+# The cache holding the version stamps. Stamps expire after its TIMEOUT, which bounds how long
+# a process serves fragments that another process (such as a management command) retired.
+VERSION_CACHE = "fragment_versions"
+
+VERSION_KEY = "fragment-version:{}"
+
+# Bumped when something every fragment may show changes (a shelter, or a worker or volunteer,
+# whose names appear as assignees and comment authors)
+GENERATION = "generation"
+
+
+def _object_key(kind, pk):
+    return VERSION_KEY.format(f"{kind}-{pk}")
+
+
+def fragment_version(kind, pk):
+    """
+    Returns the version stamp of one object's cached fragments (kind is "task", "animal" or
+    "worker"), for use in the key of a {% cache %} tag. The stamp changes whenever the object,
+    or something shown with it, changes (see core/signals.py), so a fragment cached under an old
+    stamp is never read again and ages out of the LRU fragment cache. Stamps that are missing,
+    because they were invalidated, evicted or expired, are replaced by new random ones.
+    """
+    cache = caches[VERSION_CACHE]
+    keys = [VERSION_KEY.format(GENERATION), _object_key(kind, pk)]
+    stamps = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex[:12] for key in keys if key not in stamps}
+    if missing:
+        cache.set_many(missing)
+        stamps.update(missing)
+    return ".".join(stamps[key] for key in keys)
+
+
+def invalidate_fragments(kind, pk):
+    """
+    Drops the version stamp of one object once the current transaction commits (immediately
+    outside a transaction). Bumping it any earlier would let a request that still reads the
+    old rows cache them under the new stamp.
+    """
+    key = _object_key(kind, pk)
+    transaction.on_commit(lambda: caches[VERSION_CACHE].delete(key))
+
+
+def invalidate_all_fragments():
+    """Drops the shared generation stamp, which retires every cached fragment, on commit."""
+    key = VERSION_KEY.format(GENERATION)
+    transaction.on_commit(lambda: caches[VERSION_CACHE].delete(key))
@@ -0,0 +1,154 @@
+import hashlib
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .media import render_variants, store_image
+
+# Downloaded images are kept here between runs, so seeding again needs no network
+IMAGE_CACHE_DIR = Path(settings.BASE_DIR) / ".image_cache"
+
+# The images bundled with the app, used when seeding offline
+BUNDLED_IMAGE_DIR = Path(settings.BASE_DIR) / "core" / "static" / "images"
+
+RANDOM_DOG_URL = "https://random.dog/woof.json"
+# random.dog also serves videos and GIFs; only these are kept
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+# Random picks per image before giving up (most of random.dog is photos)
+MAX_ATTEMPTS = 10
+FETCH_TIMEOUT = 15
+
+# The provider the fixture scripts use, unless PAWPLAN_IMAGES names one
+PROVIDER_ENV = "PAWPLAN_IMAGES"
+
+
+class ImageProvider:
+    """
+    Supplies images for seeding the database. Subclasses implement paths(); images() stores
+    the files through core/media.py (content-hashed, with thumbnail and WebP variants) on a
+    thread pool and returns StoredImages, whose url and digest go in Animal.image and
+    Animal.image_hash.
+
+    Attributes:
+    threads: The number of images fetched or resized at the same time.
+    """
+
+    def __init__(self, threads=8):
+        self.threads = threads
+
+    def paths(self, count):
+        """Returns count paths of local image files (the same file may appear more than once)."""
+        raise NotImplementedError
+
+    def images(self, count):
+        """Returns count StoredImages, in the order of paths()."""
+        paths = self.paths(count)
+        # Each file is stored once, so no two threads write the same variants
+        unique = list(dict.fromkeys(paths))
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            stored = dict(zip(unique, pool.map(_store_file, unique)))
+        return [stored[path] for path in paths]
+
+
+def _store_file(path):
+    stored = store_image(Path(path).read_bytes())
+    render_variants(stored)
+    return stored
+
+
+class OfflineImageProvider(ImageProvider):
+    """
+    Cycles through the image files in a directory (by default the images bundled in
+    core/static/images), so seeding never touches the network.
+
+    Attributes:
+    directory: The directory holding the images.
+    """
+
+    def __init__(self, directory=BUNDLED_IMAGE_DIR, threads=8):
+        super().__init__(threads)
+        self.directory = Path(directory)
+
+    def paths(self, count):
+        files = sorted(
+            path for path in self.directory.iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        if not files:
+            raise ValidationError(f"No images found in {self.directory}.")
+        return list(itertools.islice(itertools.cycle(files), count))
+
+
+class RandomDogProvider(ImageProvider):
+    """
+    Downloads random photos from random.dog into an on-disk cache. Images already in the cache
+    are used first, and only the missing ones are fetched, concurrently on the thread pool, so
+    seeding a second time works offline.
+
+    Attributes:
+    cache_dir: The directory downloaded images are kept in, named after the hash of their URL.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, threads=8):
+        super().__init__(threads)
+        self.cache_dir = Path(cache_dir)
+
+    def paths(self, count):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cached = sorted(
+            path for path in self.cache_dir.iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS
+        )[:count]
+        missing = count - len(cached)
+        if missing > 0:
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                cached.extend(pool.map(lambda _: self._download(), range(missing)))
+        return cached
+
+    def _download(self):
+        """Fetches one random photo into the cache and returns its path."""
+        session = requests.Session()
+        for _ in range(MAX_ATTEMPTS):
+            url = session.get(RANDOM_DOG_URL, timeout=FETCH_TIMEOUT).json()["url"]
+            extension = os.path.splitext(url)[1].lower()
+            if extension not in IMAGE_EXTENSIONS:
+                continue
+            path = self.cache_dir / (hashlib.sha256(url.encode()).hexdigest() + extension)
+            if not path.exists():
+                response = session.get(url, timeout=FETCH_TIMEOUT)
+                response.raise_for_status()
+                # Written under a temporary name first, so a failed download is never cached
+                partial = path.with_suffix(".part")
+                partial.write_bytes(response.content)
+                partial.replace(path)
+            return path
+        raise ValidationError(f"No photo found in {MAX_ATTEMPTS} tries at {RANDOM_DOG_URL}.")
+
+
+PROVIDERS = {"online": RandomDogProvider, "offline": OfflineImageProvider}
+
+
+def _online():
+    try:
+        requests.head(RANDOM_DOG_URL, timeout=3)
+    except requests.RequestException:
+        return False
+    return True
+
+
+def get_provider(name=None):
+    """
+    Returns the image provider called name ("online" or "offline"), by default the one named
+    by the PAWPLAN_IMAGES environment variable. "auto" (or nothing) picks the online provider
+    if random.dog can be reached and the offline one otherwise.
+    """
+    name = name or os.environ.get(PROVIDER_ENV, "auto")
+    if name == "auto":
+        name = "online" if _online() else "offline"
+    if name not in PROVIDERS:
+        choices = ", ".join(PROVIDERS)
+        raise ValueError(f"Unknown image provider {name!r}, expected one of {choices}.")
+    return PROVIDERS[name]()
@@ -0,0 +1,196 @@
+import csv
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, models
+from django.utils import timezone
+
+from .intake import intake_animals
+from .models import Cat, Dog, Shelter, Turtle
+
+# The "type" column of an import picks the class of each animal
+IMPORT_TYPES = {"dog": Dog, "cat": Cat, "turtle": Turtle}
+
+# Rows validated and inserted together; each batch is one transaction
+IMPORT_BATCH_SIZE = 500
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n"}
+
+RowError = namedtuple("RowError", ["line", "message"])
+
+
+class ImportResult:
+    """
+    The outcome of an import.
+
+    Attributes:
+    created: The number of animals created.
+    errors: A list of (line, message) pairs for the rows that were skipped, where line is the
+        line of the CSV file the row ended on.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+
+def _import_fields(model):
+    """The fields of model that are read from a CSV row (everything but keys and relations)."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if field.editable and not field.is_relation and not field.primary_key
+    ]
+
+
+IMPORT_FIELDS = {name: _import_fields(model) for name, model in IMPORT_TYPES.items()}
+
+
+def _clean_value(field, raw):
+    """
+    Converts one CSV cell into a value for field, raising ValidationError if it's invalid.
+    Empty cells (and missing columns) fall back to the field's default, if it has one.
+    """
+    raw = (raw or "").strip()
+    if raw == "":
+        if field.has_default():
+            return field.get_default()
+        if field.null:
+            return None
+    if isinstance(field, models.BooleanField):
+        if raw == "":
+            raise ValidationError("This field cannot be blank.")
+        if raw.lower() in TRUE_VALUES:
+            return True
+        if raw.lower() in FALSE_VALUES:
+            return False
+        raise ValidationError(f"“{raw}” is not yes/no, true/false or 1/0.")
+    value = field.clean(raw, None)
+    if isinstance(field, models.DateTimeField) and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def build_animal(row, default_shelter=None):
+    """
+    Builds an unsaved Dog, Cat or Turtle from a CSV row (a dict of column name to text). The
+    shelter is taken from the "shelter" column, or default_shelter (an id) if it's empty; it is
+    not checked here. Raises ValidationError with one message per invalid field.
+    """
+    kind = (row.get("type") or "").strip().lower()
+    if kind not in IMPORT_TYPES:
+        raise ValidationError(f"type: must be one of {', '.join(IMPORT_TYPES)}.")
+
+    values = {}
+    messages = []
+    for field in IMPORT_FIELDS[kind]:
+        try:
+            values[field.attname] = _clean_value(field, row.get(field.name))
+        except ValidationError as error:
+            messages.append(f"{field.name}: {' '.join(error.messages)}")
+
+    shelter = (row.get("shelter") or "").strip() or default_shelter
+    if shelter is None or not str(shelter).isdigit():
+        messages.append("shelter: must be a shelter id.")
+    if messages:
+        raise ValidationError(messages)
+    return IMPORT_TYPES[kind](shelter_id=int(shelter), **values)
+
+
+def _import_batch(batch, default_shelter, result, only_shelter=None):
+    """Validates and inserts one batch of (line, row) pairs, recording rows that fail."""
+    animals = []
+    lines = []
+    for line, row in batch:
+        try:
+            animal = build_animal(row, default_shelter)
+        except ValidationError as error:
+            result.errors.append(RowError(line, "; ".join(error.messages)))
+            continue
+        if only_shelter is not None and animal.shelter_id != only_shelter:
+            message = f"shelter: {animal.shelter_id} is not shelter {only_shelter}."
+            result.errors.append(RowError(line, message))
+            continue
+        animals.append(animal)
+        lines.append(line)
+
+    # One query checks every shelter id in the batch
+    shelter_ids = {animal.shelter_id for animal in animals}
+    shelters = set(Shelter.objects.filter(pk__in=shelter_ids).values_list("pk", flat=True))
+    valid = []
+    for line, animal in zip(lines, animals):
+        if animal.shelter_id in shelters:
+            valid.append((line, animal))
+        else:
+            message = f"shelter: {animal.shelter_id} does not exist."
+            result.errors.append(RowError(line, message))
+    if not valid:
+        return
+
+    try:
+        intake_animals([animal for _, animal in valid])
+    except DatabaseError as error:
+        result.errors.extend(RowError(line, f"Not saved: {error}") for line, _ in valid)
+    else:
+        result.created += len(valid)
+
+
+def decode_lines(file, encoding="utf-8-sig"):
+    """
+    Yields the lines of a binary file as text, decoding one line at a time, so a line that
+    isn't valid text is only found (and reported by import_animals()) when it's reached.
+    """
+    for line in file:
+        yield line.decode(encoding)
+
+
+def import_animals(file, default_shelter=None, batch_size=IMPORT_BATCH_SIZE, only_shelter=None):
+    """
+    Imports animals from a CSV file (an open text file, or an iterable of lines such as
+    decode_lines() returns) with a header row. Rows are read one
+    at a time and validated and saved batch_size at a time through intake_animals(), which
+    also creates each animal's AUTOMATIC_TASKS, so only one batch is ever held in memory. A row
+    that fails validation is reported in the result and skipped; it never aborts the import. A
+    line that can't be decoded or parsed as CSV is reported too, and ends the import after the
+    rows before it.
+
+    The "type" column (dog, cat or turtle) picks the class; the other columns are named after
+    the model fields (name, color, sex, age, intake_type, intake_date, image, description,
+    ready_to_adopt, shelter, is_fixed, breed, species). Columns that don't apply to a type are
+    ignored, and the shelter column may be left out when default_shelter is given. With
+    only_shelter (an id), every animal goes to that shelter: it is the default, and rows whose
+    shelter column names another shelter are skipped.
+
+    Returns an ImportResult.
+    """
+    result = ImportResult()
+    if only_shelter is not None:
+        default_shelter = only_shelter
+    reader = csv.DictReader(file)
+    batch = []
+    # The error that ended the import early, reported after the rows before it
+    stopped = None
+    try:
+        if not reader.fieldnames or "type" not in reader.fieldnames:
+            result.errors.append(RowError(1, "The header row must include a \"type\" column."))
+            return result
+
+        for row in reader:
+            batch.append((reader.line_num, row))
+            if len(batch) == batch_size:
+                _import_batch(batch, default_shelter, result, only_shelter)
+                batch = []
+    except UnicodeDecodeError:
+        # DictReader.line_num is only updated once a row is read, so this asks the csv reader,
+        # which never counted the line that couldn't be decoded
+        message = "The file is not UTF-8 text; the rest was not imported."
+        stopped = RowError(reader.reader.line_num + 1, message)
+    except csv.Error as error:
+        message = f"Malformed CSV ({error}); the rest was not imported."
+        stopped = RowError(reader.reader.line_num, message)
+    if batch:
+        _import_batch(batch, default_shelter, result, only_shelter)
+    if stopped is not None:
+        result.errors.append(stopped)
+    return result
@@ -0,0 +1,174 @@
+import contextvars
+import glob
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+# The RequestMetrics of the request being handled (None outside of QueryTimingMiddleware)
+_current_metrics = contextvars.ContextVar("current_request_metrics", default=None)
+
+# How many recent samples are kept per view, and how often (seconds) they are written to disk
+SAMPLE_SIZE = 1000
+FLUSH_INTERVAL = 10
+# Sample files not rewritten for this long (seconds) belong to processes that have exited (or
+# served nothing since) and are deleted instead of reported
+STALE_AFTER = 24 * 60 * 60
+
+
+class RequestMetrics:
+    """
+    Counters for a single request, filled in by QueryTimingMiddleware and the instrumented
+    template backend.
+
+    Attributes:
+    query_count: The number of SQL queries executed.
+    sql_time: The total time spent executing SQL, in seconds.
+    statements: A Counter of SQL statement text (without parameters) -> times executed.
+    template_time: The total time spent rendering templates, in seconds. This includes any
+        queries that lazy querysets run while the template is rendered.
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.template_time = 0.0
+
+    @property
+    def duplicate_queries(self):
+        """
+        The number of queries that repeated an earlier statement with the same SQL text, which is
+        how N+1 patterns (one identical query per row with a different id) show up.
+        """
+        return sum(count - 1 for count in self.statements.values())
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper (see connection.execute_wrapper()) timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.query_count += 1
+            self.statements[sql] += 1
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics = _current_metrics.get()
+            if metrics is not None:
+                metrics.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    The regular Django template backend, except that top-level template renders are timed into
+    the current request's RequestMetrics. Included templates are part of the outer render.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def percentile(values, fraction):
+    """Returns the value at the given fraction (0-1) of values using nearest-rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+# The fields of one sample, in the order they are stored
+SAMPLE_FIELDS = ("total_ms", "queries", "sql_ms", "duplicates", "template_ms", "bytes")
+
+
+def summarize(samples):
+    """
+    Summarizes a list of samples (tuples in SAMPLE_FIELDS order) into a dict with the request
+    count and the p50/p95 of every field.
+    """
+    summary = {"requests": len(samples)}
+    for i, field in enumerate(SAMPLE_FIELDS):
+        values = [sample[i] for sample in samples if sample[i] is not None]
+        summary[f"{field}_p50"] = percentile(values, 0.50)
+        summary[f"{field}_p95"] = percentile(values, 0.95)
+    return summary
+
+
+class ViewMetrics:
+    """
+    Rolling, in-process aggregate of the last SAMPLE_SIZE requests per URL name. Every
+    FLUSH_INTERVAL seconds the samples are written to a per-process JSON file in
+    settings.VIEW_METRICS_DIR (if set) so that the view_metrics management command, which runs in
+    its own process, can merge and report them.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(lambda: deque(maxlen=SAMPLE_SIZE))
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def record(self, view_name, sample):
+        with self.lock:
+            self.samples[view_name].append(sample)
+            should_flush = time.monotonic() - self.last_flush >= FLUSH_INTERVAL
+            if should_flush:
+                self.last_flush = time.monotonic()
+                snapshot = {name: list(values) for name, values in self.samples.items()}
+        if should_flush:
+            self.flush(snapshot)
+
+    def flush(self, snapshot):
+        directory = getattr(settings, "VIEW_METRICS_DIR", None)
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"view_metrics-{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(snapshot, f)
+        os.replace(f"{path}.tmp", path)
+        # Every process's pid gets a new file, so the ones of exited processes are cleaned up here
+        metrics_files(directory)
+
+    def summary(self):
+        with self.lock:
+            return {name: summarize(list(values)) for name, values in self.samples.items()}
+
+
+def metrics_files(directory):
+    """
+    Returns the paths of the per-process sample files in directory that were written in the
+    last STALE_AFTER seconds, deleting the older ones.
+    """
+    fresh = []
+    cutoff = time.time() - STALE_AFTER
+    for path in glob.glob(os.path.join(directory, "view_metrics-*.json")):
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                fresh.append(path)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            # Removed by another process in the meantime
+            pass
+    return fresh
+
+
+view_metrics = ViewMetrics()
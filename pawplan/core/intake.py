@@ -0,0 +1,180 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_create_inherited
+from .events import task_changed
+from .facets import invalidate_animal_facets
+from .jobs import register
+from .models import Address, Adopter, Animal, Person, Task, Volunteer
+from .search import index_documents
+
+# Job kinds enqueued by the public adoption and volunteer forms
+ADOPTION_JOB = "intake.adoption"
+VOLUNTEER_JOB = "intake.volunteer"
+
+ADOPTION_STEPS = ["Contact client", "Fill out paperwork", "Interview client"]
+VOLUNTEER_STEPS = ["contact volunteer"]
+
+
+def intake_animals(animals, batch_size=None):
+    """
+    Batch intake API for transfers and hoarding cases. Saves many unsaved Dog, Cat and Turtle
+    instances together with all of their AUTOMATIC_TASKS and TaskItems in one transaction, using
+    multi-row INSERTs (two per animal class, plus one each for tasks and items). The only thing
+    that grows with the batch is the number of chunks needed to stay under the database's
+    query-parameter limit.
+
+    Like bulk_create(), this skips Animal.save() and model signals, so the caches that signals
+    would normally invalidate are cleared (and the animals added to the search index) here
+    instead.
+
+    Arguments:
+    animals: An iterable of unsaved Animal subclass instances.
+    batch_size: The maximum number of rows per INSERT statement (optional).
+
+    Returns the list of saved animals.
+    """
+    animals = list(animals)
+    with transaction.atomic():
+        bulk_create_inherited(animals, batch_size=batch_size)
+        Animal.create_automatic_tasks(animals)
+        index_documents("animal", animals, replace=False)
+    invalidate_animal_facets()
+    return animals
+
+
+def _address_fields(payload):
+    """Maps the address fields of an AdoptionForm payload onto Address fields."""
+    return {
+        "street1": payload["address_one"],
+        "street2": payload.get("address_two", ""),
+        "city": payload["city"],
+        "state": payload["state"],
+        "postal": payload["postal"],
+        "country": payload["country"],
+    }
+
+
+def _create_people(payloads, make_person):
+    """
+    Creates a person for every payload whose email isn't in the database yet, the way the intake
+    forms used to do one at a time, but with a fixed number of queries for the whole batch:
+    one lookup for existing emails, one for existing addresses (by fingerprint), and bulk INSERTs
+    for the new addresses and people. make_person(payload, address) returns an unsaved Person.
+    """
+    existing = set(
+        Person.objects.filter(email__in={p["email"] for p in payloads}).values_list(
+            "email", flat=True
+        )
+    )
+    new = {}
+    for payload in payloads:
+        if payload["email"] not in existing:
+            new.setdefault(payload["email"], payload)
+    if not new:
+        return
+
+    fingerprints = {
+        email: Address.compute_fingerprint(**_address_fields(payload))
+        for email, payload in new.items()
+    }
+    addresses = Address.objects.in_bulk(set(fingerprints.values()), field_name="fingerprint")
+    missing = {}
+    for email, fingerprint in fingerprints.items():
+        if fingerprint not in addresses and fingerprint not in missing:
+            missing[fingerprint] = Address(
+                fingerprint=fingerprint, **_address_fields(new[email])
+            )
+    Address.objects.bulk_create(missing.values())
+    addresses.update(missing)
+
+    bulk_create_inherited(
+        make_person(payload, addresses[fingerprints[email]]) for email, payload in new.items()
+    )
+
+
+def _create_tasks(tasks, steps):
+    Task.bulk_create_with_items(tasks, [steps] * len(tasks))
+    for task in tasks:
+        task_changed(task.pk)
+
+
+@register(ADOPTION_JOB)
+def process_adoptions(jobs):
+    """
+    Handles a batch of adoption form submissions: creates the missing Adopters and one
+    "Adoption" task (with its steps) per submission. Jobs for animals that no longer exist
+    fail without retrying.
+    """
+    animals = Animal.objects.non_polymorphic().only("id", "shelter_id").in_bulk(
+        {job.payload["pet_id"] for job in jobs}
+    )
+    errors = {
+        job.pk: f"Animal {job.payload['pet_id']} does not exist."
+        for job in jobs
+        if job.payload["pet_id"] not in animals
+    }
+    jobs = [job for job in jobs if job.pk not in errors]
+
+    _create_people(
+        [job.payload for job in jobs],
+        lambda payload, address: Adopter(
+            name=payload["name"],
+            phone_number=payload["phone_number"],
+            email=payload["email"],
+            address=address,
+            can_adopt=False,
+        ),
+    )
+    tasks = []
+    for job in jobs:
+        animal = animals[job.payload["pet_id"]]
+        tasks.append(
+            Task(
+                title="Adoption",
+                description=(
+                    f"{job.payload['name']} is interested in adopting. Please contact them."
+                ),
+                required_role="MA",
+                shelter_id=animal.shelter_id,
+                animal_id=animal.pk,
+            )
+        )
+    _create_tasks(tasks, ADOPTION_STEPS)
+    return errors
+
+
+@register(VOLUNTEER_JOB)
+def process_volunteers(jobs):
+    """
+    Handles a batch of volunteer form submissions: creates the missing Volunteers and one
+    "Volunteer" task per submission.
+    """
+    today = timezone.localdate()
+    _create_people(
+        [job.payload for job in jobs],
+        lambda payload, address: Volunteer(
+            name=payload["name"],
+            phone_number=payload["phone_number"],
+            email=payload["email"],
+            address=address,
+            start_date=today,
+            shelter_id=payload["shelter_id"],
+        ),
+    )
+    _create_tasks(
+        [
+            Task(
+                title="Volunteer",
+                description=(
+                    f"{job.payload['name']} is interested in being a volunteer. "
+                    "Please contact them."
+                ),
+                required_role="MA",
+                shelter_id=job.payload["shelter_id"],
+            )
+            for job in jobs
+        ],
+        VOLUNTEER_STEPS,
+    )
+    return {}
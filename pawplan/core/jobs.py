@@ -0,0 +1,174 @@
+import datetime
+import logging
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Subquery
+from django.utils import timezone
+
+from .instrumentation import percentile
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler. A handler gets a list of claimed jobs of its kind and processes them together,
+# ideally with bulk queries. It may return {job id: error message} for jobs that can never succeed
+# (they are marked FAILED right away); raising an exception retries the jobs instead.
+HANDLERS = {}
+
+# Seconds before the first retry of a failed job; doubled with every further attempt
+RETRY_BACKOFF = 5
+
+
+def register(kind):
+    """Decorator that registers a batch handler for jobs of the given kind."""
+
+    def decorator(handler):
+        HANDLERS[kind] = handler
+        return handler
+
+    return decorator
+
+
+def enqueue(kind, payload):
+    """Adds a job to the queue (a single INSERT) and returns it."""
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def claim_batch(limit):
+    """
+    Claims up to limit due pending jobs for this worker thread by flipping them to RUNNING under
+    a fresh claim token, and returns them. The claim is a single UPDATE that only touches rows
+    that are still PENDING, so two workers can never claim the same job (and SQLite never has to
+    upgrade a read transaction to a write one, which fails instead of waiting when contended).
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = (
+        Job.objects.filter(status=Job.PENDING, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values("id")[:limit]
+    )
+    claimed = Job.objects.filter(pk__in=Subquery(due), status=Job.PENDING).update(
+        status=Job.RUNNING, claim_token=token, started_datetime=now
+    )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(claim_token=token, status=Job.RUNNING).order_by("id"))
+
+
+def requeue_stale(older_than):
+    """
+    Puts jobs that have been RUNNING for longer than older_than (a timedelta) back in the queue,
+    e.g. after a worker was killed in the middle of a batch. Returns how many were requeued.
+    """
+    return Job.objects.filter(
+        status=Job.RUNNING, started_datetime__lt=timezone.now() - older_than
+    ).update(status=Job.PENDING, claim_token="")
+
+
+def _finish(jobs, errors):
+    now = timezone.now()
+    failed = [job.pk for job in jobs if job.pk in errors]
+    done = [job.pk for job in jobs if job.pk not in errors]
+    Job.objects.filter(pk__in=done).update(
+        status=Job.DONE, finished_datetime=now, last_error=""
+    )
+    for pk in failed:
+        Job.objects.filter(pk=pk).update(
+            status=Job.FAILED, finished_datetime=now, last_error=errors[pk]
+        )
+
+
+def _process(handler, jobs):
+    """
+    Runs handler on jobs and records the outcome in the same transaction, so the work and the
+    job status are committed (or rolled back) together. Returns the number of jobs completed.
+    """
+    with transaction.atomic():
+        # Writing first takes the database write lock up front. A SQLite transaction that starts
+        # with reads can't wait for the lock when it later writes; it fails with "database is
+        # locked" right away whenever another worker is writing.
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(attempts=F("attempts") + 1)
+        errors = handler(jobs) or {}
+        _finish(jobs, errors)
+    return len(jobs) - len(errors)
+
+
+def _retry_later(job, error):
+    job.attempts += 1
+    job.last_error = error
+    if job.attempts >= job.max_attempts:
+        job.status = Job.FAILED
+        job.finished_datetime = timezone.now()
+    else:
+        job.status = Job.PENDING
+        job.run_after = timezone.now() + datetime.timedelta(
+            seconds=RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        )
+    job.save(
+        update_fields=["attempts", "last_error", "status", "finished_datetime", "run_after"]
+    )
+
+
+def run_batch(jobs):
+    """
+    Processes claimed jobs, one handler call per kind inside its own transaction. If a batch
+    fails, its jobs are retried one by one so that a single bad job can't hold back the rest;
+    jobs that fail on their own are rescheduled with exponential backoff, and marked FAILED once
+    they run out of attempts. Returns the number of jobs that completed.
+    """
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+
+    completed = 0
+    for kind, group in by_kind.items():
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            with transaction.atomic():
+                _finish(group, {job.pk: f"No handler registered for {kind!r}." for job in group})
+            continue
+        try:
+            completed += _process(handler, group)
+            continue
+        except Exception:
+            logger.exception("Batch of %d %s jobs failed, retrying one by one", len(group), kind)
+
+        for job in group:
+            try:
+                completed += _process(handler, [job])
+            except Exception as exc:
+                logger.exception("Job %s failed", job.pk)
+                _retry_later(job, f"{type(exc).__name__}: {exc}")
+    return completed
+
+
+def queue_stats(sample_size=1000):
+    """
+    Returns the queue depth per status and kind, the age of the oldest due pending job in
+    seconds, and the p50/p95 latency (enqueue to finish, in seconds) of the most recently
+    finished jobs.
+    """
+    now = timezone.now()
+    depth = {}
+    for row in Job.objects.values("kind", "status").annotate(count=Count("id")).order_by():
+        depth.setdefault(row["kind"], {})[Job.STATUS_CHOICES[row["status"]]] = row["count"]
+
+    oldest = Job.objects.filter(status=Job.PENDING, run_after__lte=now).aggregate(
+        oldest=Min("run_after")
+    )["oldest"]
+
+    finished = (
+        Job.objects.filter(status=Job.DONE)
+        .order_by("-finished_datetime")
+        .values_list("created_datetime", "finished_datetime")[:sample_size]
+    )
+    latencies = [(end - start).total_seconds() for start, end in finished]
+    return {
+        "depth": depth,
+        "oldest_pending_seconds": (now - oldest).total_seconds() if oldest else None,
+        "latency_seconds_p50": percentile(latencies, 0.50),
+        "latency_seconds_p95": percentile(latencies, 0.95),
+        "latency_sample": len(latencies),
+    }
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmarks import BUDGETS_PATH, check_budgets, load_budgets, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds generated datasets of several sizes into a throwaway test database, drives the "
+        "hot views through the test client and reports latency percentiles and query counts. "
+        "Fails if any view exceeds its budget in core/benchmark_budgets.json."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[50, 1000],
+            help="Dataset sizes (number of animals) to benchmark.",
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--budgets", default=str(BUDGETS_PATH))
+        parser.add_argument(
+            "--no-budgets", action="store_true", help="Only report, never fail."
+        )
+
+    def handle(self, *args, **options):
+        budgets = load_budgets(options["budgets"])
+
+        # Never touch the development database: benchmark in a fresh test database
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmarks(options["sizes"], options["iterations"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        violations = []
+        header = f"{'size':>7}  {'view':<26}{'queries':>8}{'p50 ms':>9}{'p95 ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for size, views in results.items():
+            for name, result in views.items():
+                self.stdout.write(
+                    f"{size:>7}  {name:<26}{result['queries']:>8}"
+                    f"{result['latency_ms_p50']:>9.1f}{result['latency_ms_p95']:>9.1f}"
+                )
+            violations.extend(check_budgets(size, views, budgets))
+
+        if violations and not options["no_budgets"]:
+            raise CommandError("Budgets exceeded:\n" + "\n".join(violations))
+        self.stdout.write(self.style.SUCCESS("All views within budget."))
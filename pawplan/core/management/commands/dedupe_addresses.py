@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Address
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills in the fingerprint of every address and merges addresses that only differ in case, "
+        "spacing or punctuation: references from shelters and people are moved to the oldest "
+        "copy and the other copies are deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would be merged."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # Oldest address per fingerprint, the duplicates that merge into it, and the kept
+        # addresses whose stored fingerprint is missing or stale
+        keep = {}
+        duplicates = defaultdict(list)
+        stale = []
+        addresses = Address.objects.only("id", "fingerprint", *Address.FIELDS).order_by("id")
+        for address in addresses.iterator(chunk_size=2000):
+            fingerprint = Address.compute_fingerprint(
+                **{name: getattr(address, name) for name in Address.FIELDS}
+            )
+            if fingerprint in keep:
+                duplicates[keep[fingerprint].pk].append(address.pk)
+                continue
+            keep[fingerprint] = address
+            if address.fingerprint != fingerprint:
+                address.fingerprint = fingerprint
+                stale.append(address)
+
+        merged = sum(len(ids) for ids in duplicates.values())
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would merge {merged} duplicate address(es) into {len(duplicates)} and set "
+                f"{len(stale)} fingerprint(s)."
+            )
+            return
+
+        # Every foreign key to Address (Shelter.address, Person.address)
+        relations = [rel for rel in Address._meta.related_objects if not rel.many_to_many]
+        with transaction.atomic():
+            for keep_id, duplicate_ids in duplicates.items():
+                for rel in relations:
+                    rel.related_model._base_manager.filter(
+                        **{f"{rel.field.name}__in": duplicate_ids}
+                    ).update(**{rel.field.name: keep_id})
+            duplicate_ids = [pk for ids in duplicates.values() for pk in ids]
+            for start in range(0, len(duplicate_ids), batch_size):
+                Address.objects.filter(pk__in=duplicate_ids[start:start + batch_size]).delete()
+            # The duplicates are gone, so the unique fingerprints can be written now
+            Address.objects.bulk_update(stale, ["fingerprint"], batch_size=batch_size)
+
+        self.stdout.write(
+            f"Merged {merged} duplicate address(es) into {len(duplicates)} and set "
+            f"{len(stale)} fingerprint(s)."
+        )
@@ -0,0 +1,50 @@
+import argparse
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.exports import EXPORTS, FORMATS, export_lines
+
+
+def _date(value):
+    try:
+        date = parse_date(value)
+    except ValueError:
+        # Well formatted but not a real date, such as 2024-02-30
+        date = None
+    if date is None:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a date in YYYY-MM-DD format.")
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams animals, tasks, task items or comments to a CSV or JSONL file (or stdout) "
+        "with constant memory use, optionally limited to one shelter and a date range."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write to (default: stdout).")
+        parser.add_argument("--shelter", type=int, help="Only export this shelter id.")
+        parser.add_argument("--since", type=_date, help="First date to include (YYYY-MM-DD).")
+        parser.add_argument("--until", type=_date, help="First date to exclude (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        lines = export_lines(
+            options["dataset"],
+            options["format"],
+            shelter=options["shelter"],
+            since=options["since"],
+            until=options["until"],
+        )
+        if options["output"] is None:
+            for text in lines:
+                self.stdout.write(text, ending="")
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as f:
+            for text in lines:
+                f.write(text)
@@ -0,0 +1,379 @@
+import argparse
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.bulk import bulk_create_inherited
+from core.intake import intake_animals
+from core.search import rebuild_index
+from core.models import (
+    Address,
+    Animal,
+    AnimalComment,
+    Cat,
+    Dog,
+    Person,
+    Shelter,
+    Task,
+    TaskComment,
+    TaskItem,
+    Turtle,
+    Volunteer,
+    Worker,
+)
+
+# The day every generated date is relative to (see --anchor-date). A fixed default keeps the data,
+# and the benchmarks run against it, the same no matter when the command runs.
+DEFAULT_ANCHOR_DATE = datetime.date(2025, 1, 1)
+
+# Images bundled with the app, so no network access is needed
+BUNDLED_IMAGES = [
+    "/static/images/dog1.jpg",
+    "/static/images/dog2.jpg",
+    "/static/images/dog3.jpg",
+    "/static/puppy.jpg",
+]
+
+FIRST_NAMES = [
+    "Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Drew",
+    "Sam", "Charlie", "Parker", "Reese", "Skyler", "Rowan", "Emerson", "Hayden", "Logan", "Kai",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Lopez",
+    "Wilson", "Anderson", "Thomas", "Moore", "Martin", "Lee", "Clark", "Lewis", "Walker", "Hall",
+]
+PET_NAMES = [
+    "Bubba", "Charlie", "Princess", "Jennifer", "Larry", "Gadget", "Mitra", "Rosie", "Hooch",
+    "Ella", "Max", "Bella", "Luna", "Cooper", "Daisy", "Milo", "Sadie", "Rocky", "Lola", "Bear",
+]
+CITIES = [
+    ("Glassboro", "NJ"), ("Philadelphia", "PA"), ("New York", "NY"), ("Edison", "NJ"),
+    ("Ocean City", "NJ"), ("Lawnside", "NJ"), ("Camden", "NJ"), ("Wilmington", "DE"),
+]
+STREETS = ["Main St.", "Broad St.", "Rowan Blvd.", "Penns Ave.", "South St.", "Juniper Dr."]
+
+# (color, weight) - a few common colors and a long tail
+COLORS = [
+    ("Black", 20), ("White", 12), ("Brown", 15), ("Tricolor", 8), ("Brindle", 6), ("Cream", 6),
+    ("Orange", 5), ("Tuxedo", 5), ("Gray", 8), ("Multi", 10), ("yellow/green", 1),
+]
+DOG_BREEDS = ["Shepherd Mix", "Terrier Mix", "Maltese", "Rotweiler", "Pit Bull Mix", "Labrador"]
+CAT_BREEDS = ["Tabby", "Domestic Shorthair", "Domestic Longhair", "Siamese Mix"]
+TURTLE_SPECIES = ["Red-eared Slider", "Box Turtle", "Painted Turtle"]
+
+TASK_TEMPLATES = [
+    ("Clean the Kennels", "Hose down and disinfect every kennel.", "RE"),
+    ("Feed the Cats", "The cats are hungry.", "RE"),
+    ("Walk the Dogs", "Take every dog out for at least twenty minutes.", "NA"),
+    ("Restock Supplies", "Order food, litter and cleaning supplies.", "MA"),
+    ("Post Available Jobs Online", "Post listings for open roles.", "MA"),
+    ("Medication Round", "Administer the scheduled medications.", "VT"),
+    ("Intake Exam", "Examine the newest arrivals.", "VT"),
+]
+COMMENT_TEXTS = [
+    "Done for today.", "Needs a follow up tomorrow.", "Running low on supplies.",
+    "Very friendly today!", "Please double check this one.", "Bit me again.", "Looking better.",
+]
+
+
+def anchor_datetime(anchor_date):
+    """Returns midnight (UTC) at the start of anchor_date, which generated dates are offset from."""
+    return datetime.datetime.combine(
+        anchor_date, datetime.time.min, tzinfo=datetime.timezone.utc
+    )
+
+
+def _anchor_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a date in YYYY-MM-DD format.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a deterministic (for a given --seed and --anchor-date) synthetic dataset of "
+        "shelters, workers, volunteers, animals, tasks, task items and comments using bulk "
+        "inserts. No network access is needed, so it can be used to reproduce production-sized "
+        "data locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shelters", type=int, default=5)
+        parser.add_argument("--workers", type=int, default=50)
+        parser.add_argument("--volunteers", type=int, default=50)
+        parser.add_argument("--animals", type=int, default=1000)
+        parser.add_argument(
+            "--tasks",
+            type=int,
+            default=10000,
+            help="Number of ad hoc tasks, on top of the automatic tasks created for each animal.",
+        )
+        parser.add_argument("--max-items", type=int, default=5, help="Maximum items per task.")
+        parser.add_argument("--comments", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--anchor-date",
+            type=_anchor_date,
+            default=DEFAULT_ANCHOR_DATE,
+            help=(
+                "The day (YYYY-MM-DD) the generated dates are relative to, "
+                f"{DEFAULT_ANCHOR_DATE.isoformat()} by default."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--flush", action="store_true", help="Delete all existing app data first."
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.verbosity = options["verbosity"]
+        # Every date is relative to the anchor, so repeated runs produce the same data
+        self.now = anchor_datetime(options["anchor_date"])
+        started = time.perf_counter()
+
+        if options["flush"]:
+            self.flush()
+
+        shelters = self.create_shelters(options["shelters"])
+        workers = self.create_people(Worker, options["workers"], shelters)
+        self.create_people(Volunteer, options["volunteers"], shelters)
+        animal_ids = self.create_animals(options["animals"], shelters)
+        task_ids = self.create_tasks(
+            options["tasks"], options["max_items"], shelters, workers, animal_ids
+        )
+        self.create_comments(options["comments"], workers, task_ids, animal_ids)
+
+        # The tasks, items and comments were bulk inserted without signals, so index them in one go
+        with transaction.atomic():
+            rebuild_index()
+        self.log("Rebuilt the search index.")
+
+        self.log(f"Done in {time.perf_counter() - started:.1f}s.", verbosity=0)
+
+    def log(self, message, verbosity=1):
+        if self.verbosity >= verbosity:
+            self.stdout.write(message)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def random_datetime(self, days_before, days_after=0):
+        seconds = self.rng.randint(-days_before * 86400, days_after * 86400)
+        return self.now + datetime.timedelta(seconds=seconds)
+
+    def flush(self):
+        for model in [TaskComment, AnimalComment, Task, Animal, Person, Shelter, Address]:
+            queryset = model.objects.all()
+            # Deleting through a polymorphic queryset collects the subclass rows in an order that
+            # trips SQLite's foreign key check, so delete from the base table and cascade down
+            if hasattr(queryset, "non_polymorphic"):
+                queryset = queryset.non_polymorphic()
+            queryset.delete()
+        self.log("Deleted existing data.")
+
+    def create_addresses(self, count):
+        addresses = []
+        for _ in range(count):
+            city, state = self.rng.choice(CITIES)
+            addresses.append(
+                Address(
+                    street1=f"{self.rng.randint(1, 9999)} {self.rng.choice(STREETS)}",
+                    street2=f"Apt. {self.rng.randint(1, 40)}" if self.rng.random() < 0.3 else None,
+                    city=city,
+                    state=state,
+                    postal=f"{self.rng.randint(1000, 99999):05d}",
+                    country="US",
+                )
+            )
+        # bulk_create() skips Address.save(), which normally sets the fingerprint
+        for address in addresses:
+            address.fingerprint = Address.compute_fingerprint(
+                **{name: getattr(address, name) for name in Address.FIELDS}
+            )
+        return Address.objects.bulk_create(addresses, batch_size=self.batch_size)
+
+    def create_shelters(self, count):
+        with transaction.atomic():
+            addresses = self.create_addresses(count)
+            shelters = Shelter.objects.bulk_create(
+                Shelter(
+                    name=f"{self.rng.choice(LAST_NAMES)} Animal Shelter #{i + 1}",
+                    phone_number=f"800-555-{i:04d}",
+                    email_address=f"shelter{i + 1}@example.com",
+                    address=address,
+                )
+                for i, address in enumerate(addresses)
+            )
+        self.log(f"Created {len(shelters)} shelters.")
+        return shelters
+
+    def pick_shelter(self, shelters):
+        # Shelter sizes follow a long tail: the first shelters are much busier than the last ones
+        return self.rng.choices(shelters, weights=[1 / (i + 1) for i in range(len(shelters))])[0]
+
+    def create_people(self, model, count, shelters):
+        people = []
+        for size in self.batches(count):
+            with transaction.atomic():
+                addresses = self.create_addresses(size)
+                batch = []
+                for address in addresses:
+                    n = len(people) + len(batch)
+                    first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                    fields = dict(
+                        name=f"{first} {last}",
+                        phone_number=f"555-{self.rng.randint(100, 999)}-{n % 10000:04d}",
+                        email=f"{first}.{last}.{model.__name__}{n}@example.com".lower(),
+                        address=address,
+                        shelter=self.pick_shelter(shelters),
+                    )
+                    if model is Worker:
+                        role = self.rng.choices(["MA", "VT", "RE"], weights=[15, 20, 65])[0]
+                        fields.update(
+                            username=f"{first}{last}{n}".lower(),
+                            password="password",
+                            role=role,
+                            hire_date=self.random_datetime(days_before=3650).date(),
+                        )
+                    else:
+                        fields.update(start_date=self.random_datetime(days_before=730).date())
+                    batch.append(model(**fields))
+                people.extend(bulk_create_inherited(batch, batch_size=self.batch_size))
+        self.log(f"Created {len(people)} {model._meta.verbose_name_plural}.")
+        return people
+
+    def create_animals(self, count, shelters):
+        colors, color_weights = zip(*COLORS)
+        animal_ids = []
+        for size in self.batches(count):
+            batch = []
+            for _ in range(size):
+                kind = self.rng.choices([Dog, Cat, Turtle], weights=[60, 35, 5])[0]
+                fields = dict(
+                    name=self.rng.choice(PET_NAMES),
+                    color=self.rng.choices(colors, weights=color_weights)[0],
+                    intake_type=self.rng.choice(["C", "S"]),
+                    intake_date=self.random_datetime(days_before=730),
+                    image=self.rng.choice(BUNDLED_IMAGES),
+                    age=min(int(self.rng.expovariate(1 / 4)), 25),
+                    description="A generated animal looking for a home.",
+                    sex=self.rng.choice(["M", "F"]),
+                    ready_to_adopt=self.rng.random() < 0.4,
+                    shelter=self.pick_shelter(shelters),
+                )
+                if kind is Turtle:
+                    fields["species"] = self.rng.choice(TURTLE_SPECIES)
+                else:
+                    fields["is_fixed"] = self.rng.random() < 0.5
+                    fields["breed"] = self.rng.choice(DOG_BREEDS if kind is Dog else CAT_BREEDS)
+                batch.append(kind(**fields))
+            with transaction.atomic():
+                animals = intake_animals(batch, batch_size=self.batch_size)
+                # The automatic tasks take their due date from the model default and their
+                # timestamps from the clock, so they are moved to the anchor
+                Task.objects.filter(animal_id__in=[animal.pk for animal in animals]).update(
+                    due_date=self.now + datetime.timedelta(days=7),
+                    creation_datetime=self.now,
+                    modified_datetime=self.now,
+                )
+            animal_ids.extend(animal.pk for animal in animals)
+            self.log(f"Created {len(animal_ids)} animals (with their automatic tasks).", verbosity=2)
+        self.log(f"Created {len(animal_ids)} animals (with their automatic tasks).")
+        return animal_ids
+
+    def create_tasks(self, count, max_items, shelters, workers, animal_ids):
+        workers_by_shelter = {}
+        for worker in workers:
+            workers_by_shelter.setdefault(worker.shelter_id, []).append(worker.pk)
+
+        task_ids = []
+        for size in self.batches(count):
+            with transaction.atomic():
+                tasks = []
+                for _ in range(size):
+                    title, description, role = self.rng.choice(TASK_TEMPLATES)
+                    shelter = self.pick_shelter(shelters)
+                    due = self.random_datetime(days_before=365, days_after=30)
+                    # Past-due tasks are much more likely to be done
+                    completed = self.rng.random() < (0.95 if due < self.now else 0.1)
+                    staff = workers_by_shelter.get(shelter.pk)
+                    assignee = None
+                    if staff and self.rng.random() < 0.8:
+                        assignee = self.rng.choice(staff)
+                    animal = None
+                    if animal_ids and self.rng.random() < 0.5:
+                        animal = self.rng.choice(animal_ids)
+                    completion = None
+                    if completed:
+                        completion = due - datetime.timedelta(hours=self.rng.randint(1, 48))
+                    tasks.append(
+                        Task(
+                            title=title,
+                            description=description,
+                            shelter=shelter,
+                            assignee_id=assignee,
+                            due_date=due,
+                            completion_datetime=completion,
+                            required_role=role,
+                            animal_id=animal,
+                            is_released=self.rng.random() < 0.05,
+                        )
+                    )
+                for task in tasks:
+                    task.items_total = self.rng.randint(1, max_items)
+                    task.items_complete = (
+                        task.items_total
+                        if task.completion_datetime
+                        else self.rng.randint(0, task.items_total)
+                    )
+                Task.objects.bulk_create(tasks)
+                # bulk_create() stamps auto_now fields with the clock
+                Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                    creation_datetime=self.now, modified_datetime=self.now
+                )
+
+                items = []
+                for task in tasks:
+                    items.extend(
+                        TaskItem(
+                            item_number=n + 1,
+                            text=f"Step {n + 1}",
+                            is_complete=n < task.items_complete,
+                            task=task,
+                        )
+                        for n in range(task.items_total)
+                    )
+                TaskItem.objects.bulk_create(items, batch_size=self.batch_size)
+            task_ids.extend(task.pk for task in tasks)
+            self.log(f"Created {len(task_ids)} tasks.", verbosity=2)
+        self.log(f"Created {len(task_ids)} tasks with items.")
+        return task_ids
+
+    def create_comments(self, count, workers, task_ids, animal_ids):
+        worker_ids = [worker.pk for worker in workers]
+        created = 0
+        for size in self.batches(count):
+            with transaction.atomic():
+                comments = []
+                for _ in range(size):
+                    fields = dict(
+                        person_id=self.rng.choice(worker_ids) if worker_ids else None,
+                        text=self.rng.choice(COMMENT_TEXTS),
+                        timeStamp=self.random_datetime(days_before=1).time(),
+                    )
+                    if animal_ids and (not task_ids or self.rng.random() < 0.4):
+                        animal_id = self.rng.choice(animal_ids)
+                        comments.append(AnimalComment(animal_id=animal_id, **fields))
+                    elif task_ids:
+                        task_id = self.rng.choice(task_ids)
+                        comments.append(TaskComment(task_id=task_id, **fields))
+                bulk_create_inherited(comments, batch_size=self.batch_size)
+            created += len(comments)
+        self.log(f"Created {created} comments.")
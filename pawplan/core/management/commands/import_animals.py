@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORT_BATCH_SIZE, decode_lines, import_animals
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports Dogs, Cats and Turtles (with their automatic tasks) from a CSV file in batched "
+        "bulk inserts. Invalid rows are reported and skipped. See core/imports.py for the columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The CSV file to import.")
+        parser.add_argument(
+            "--shelter", type=int, help="Shelter id for rows without a shelter column."
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            f = open(options["path"], "rb")
+        except OSError as error:
+            raise CommandError(error)
+        with f:
+            result = import_animals(decode_lines(f), options["shelter"], options["batch_size"])
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(
+            f"Imported {result.created} animal(s); skipped {len(result.errors)} row(s)."
+        )
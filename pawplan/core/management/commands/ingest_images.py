@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from core.media import ingest_source, mark_rendered
+from core.models import Animal
+
+
+class Command(BaseCommand):
+    help = (
+        "Downloads (or reads from the static files) the image of every animal that isn't stored "
+        "locally yet, stores it under its content hash with thumbnail and WebP variants, and "
+        "points the animals at it. Each distinct image is fetched and resized once, on a pool "
+        "of threads. Server processes show the new images once their fragment_versions stamps "
+        "expire, or at once if that cache is shared (see CACHES)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Images fetched and resized at the same time.",
+        )
+
+    def handle(self, *args, **options):
+        sources = (
+            Animal.objects.non_polymorphic()
+            .filter(image_hash="")
+            .exclude(image="")
+            .values_list("image", flat=True)
+            .distinct()
+        )
+
+        stored_count = 0
+        animal_count = 0
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            futures = {pool.submit(ingest_source, source): source for source in sources}
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    stored = future.result()
+                except ValidationError as error:
+                    self.stderr.write(f"Skipped {source}: {' '.join(error.messages)}")
+                    continue
+                # Database writes stay on this thread
+                animal_count += mark_rendered(stored, source)
+                stored_count += 1
+
+        self.stdout.write(
+            f"Stored {stored_count} of {len(futures)} image(s) for {animal_count} animal(s)."
+        )
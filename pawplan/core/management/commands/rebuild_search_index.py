@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.search import SEARCH_TABLE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the full-text search index over animals, tasks, task items and comments from "
+        "scratch. Signals keep the index in sync, so this is only needed after raw SQL or bulk "
+        "changes that bypassed them."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            rebuild_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+            (count,) = cursor.fetchone()
+        self.stdout.write(
+            f"Indexed {count} documents in {time.perf_counter() - started:.1f}s."
+        )
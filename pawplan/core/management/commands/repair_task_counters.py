@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.fragments import invalidate_fragments
+from core.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the items_total/items_complete counters of every task whose counters no longer "
+        "match its TaskItems (e.g. after items were edited in the admin) and fixes them in bulk. "
+        "Server processes show the repaired cards once their fragment_versions stamps expire, "
+        "or at once if that cache is shared (see CACHES)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report the drifted tasks."
+        )
+
+    def handle(self, *args, **options):
+        # One grouped query finds every drifted task together with its correct counts
+        drifted = list(Task.objects.with_drifted_counters().only("id", "items_total", "items_complete"))
+        for task in drifted:
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"Task {task.pk}: {task.items_complete}/{task.items_total} -> "
+                    f"{task.item_complete_count}/{task.item_count}"
+                )
+            task.items_total = task.item_count
+            task.items_complete = task.item_complete_count
+
+        if drifted and not options["dry_run"]:
+            with transaction.atomic():
+                Task.objects.bulk_update(
+                    drifted,
+                    ["items_total", "items_complete"],
+                    batch_size=options["batch_size"],
+                )
+                # bulk_update() sends no signals
+                for task in drifted:
+                    invalidate_fragments("task", task.pk)
+
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(f"{verb} {len(drifted)} task(s) with drifted counters.")
@@ -0,0 +1,79 @@
+import datetime
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.jobs import claim_batch, queue_stats, requeue_stale, run_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the background job workers that process queued form submissions. Each thread "
+        "claims a batch of due jobs, handles them with bulk queries and retries failures with "
+        "backoff. Use --stats to print the queue depth and latency instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds an idle worker waits before looking for new jobs.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no due jobs are left."
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=600,
+            help="Seconds after which a RUNNING job is assumed lost and requeued on start.",
+        )
+        parser.add_argument(
+            "--stats", action="store_true", help="Print queue metrics as JSON and exit."
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(queue_stats(), indent=2))
+            return
+
+        requeued = requeue_stale(datetime.timedelta(seconds=options["stale_after"]))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            futures = [
+                pool.submit(self.work, stop, options["batch_size"], options["poll_interval"], options["once"])
+                for _ in range(options["threads"])
+            ]
+            try:
+                completed = sum(future.result() for future in futures)
+            except KeyboardInterrupt:
+                # Let the threads finish the batch they are on
+                stop.set()
+                completed = sum(future.result() for future in futures)
+        self.stdout.write(f"Completed {completed} job(s).")
+
+    def work(self, stop, batch_size, poll_interval, once):
+        """The loop of one worker thread. Returns the number of jobs it completed."""
+        completed = 0
+        try:
+            while not stop.is_set():
+                jobs = claim_batch(batch_size)
+                if not jobs:
+                    if once:
+                        break
+                    stop.wait(poll_interval)
+                    continue
+                completed += run_batch(jobs)
+        finally:
+            # Every thread gets its own database connection; close it on the way out
+            connection.close()
+        return completed
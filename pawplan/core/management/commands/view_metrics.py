@@ -0,0 +1,58 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.instrumentation import metrics_files, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports the per-view query counts, SQL time, duplicate queries, template time and "
+        "response sizes (p50/p95) recorded by QueryTimingMiddleware in every server process "
+        "that wrote samples in the last day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+        parser.add_argument(
+            "--reset", action="store_true", help="Delete the recorded samples after reporting."
+        )
+
+    def handle(self, *args, **options):
+        directory = getattr(settings, "VIEW_METRICS_DIR", None)
+        # Files of processes that stopped long ago are deleted rather than reported
+        paths = metrics_files(directory) if directory else []
+
+        samples = {}
+        for path in paths:
+            with open(path) as f:
+                for view_name, values in json.load(f).items():
+                    samples.setdefault(view_name, []).extend(values)
+
+        summary = {name: summarize(values) for name, values in sorted(samples.items())}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+        elif not summary:
+            self.stdout.write("No samples recorded yet.")
+        else:
+            header = (
+                f"{'view':<28}{'reqs':>6}{'ms p50':>9}{'ms p95':>9}{'sql p50':>9}"
+                f"{'sql ms p95':>11}{'dup p95':>9}{'tpl ms p95':>11}{'KB p95':>9}"
+            )
+            self.stdout.write(header)
+            self.stdout.write("-" * len(header))
+            for name, row in summary.items():
+                size = row["bytes_p95"]
+                self.stdout.write(
+                    f"{name:<28}{row['requests']:>6}{row['total_ms_p50']:>9.1f}"
+                    f"{row['total_ms_p95']:>9.1f}{row['queries_p50']:>9}{row['sql_ms_p95']:>11.1f}"
+                    f"{row['duplicates_p95']:>9}{row['template_ms_p95']:>11.1f}"
+                    f"{(size / 1024 if size is not None else 0):>9.1f}"
+                )
+
+        if options["reset"]:
+            for path in paths:
+                os.remove(path)
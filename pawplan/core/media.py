@@ -0,0 +1,205 @@
+import hashlib
+import io
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .events import animal_changed
+from .fragments import invalidate_fragments
+from .models import Animal
+
+# Stored images live under MEDIA_ROOT/images/<first two hash digits>/<sha256 of the original>/
+IMAGE_DIR = "images"
+
+# Widths of the resized variants: cards and lists use the thumbnail, the animal modal and
+# detail page the preview. Changing a width changes the variant's file name, so the old files
+# (and the browser caches holding them) are never served for the new size.
+THUMBNAIL_WIDTH = 320
+PREVIEW_WIDTH = 800
+VARIANT_WIDTHS = (THUMBNAIL_WIDTH, PREVIEW_WIDTH)
+
+# Pillow format -> (file extension, save options) of every variant
+VARIANT_FORMATS = {
+    "JPEG": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    "WEBP": ("webp", {"quality": 80, "method": 4}),
+}
+
+# Formats an original may be in, and the largest one accepted
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+FETCH_TIMEOUT = 15
+
+# Renders the variants of uploaded images off the request thread. Resizing and encoding spend
+# most of their time in Pillow's C code, which releases the GIL.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="media")
+
+StoredImage = namedtuple("StoredImage", ["digest", "name", "url"])
+
+
+class Picture(namedtuple("Picture", ["jpeg", "webp", "width"])):
+    """
+    The URLs of one resized variant of a stored image.
+
+    Attributes:
+    jpeg: The URL of the JPEG variant, which every browser can show.
+    webp: The URL of the (smaller) WebP variant.
+    width: The width the variant was resized to (at most).
+    """
+
+
+def _image_path(digest, filename):
+    return f"{IMAGE_DIR}/{digest[:2]}/{digest}/{filename}"
+
+
+def picture(digest, width):
+    """Returns the Picture of the variant of the stored image digest that is width wide."""
+    urls = {
+        fmt: default_storage.url(_image_path(digest, f"{width}.{extension}"))
+        for fmt, (extension, _) in VARIANT_FORMATS.items()
+    }
+    return Picture(urls["JPEG"], urls["WEBP"], width)
+
+
+def validate_image(data):
+    """
+    Checks that data (the bytes of an image file) is an image in ORIGINAL_FORMATS of at most
+    MAX_IMAGE_BYTES, without storing anything. Raises ValidationError if not; returns the format.
+    """
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValidationError(f"Images can be at most {MAX_IMAGE_BYTES // (1024 * 1024)} MB.")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            fmt = image.format
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValidationError("The file is not a valid image.")
+    if fmt not in ORIGINAL_FORMATS:
+        raise ValidationError(f"{fmt} images are not supported.")
+    return fmt
+
+
+def store_image(data):
+    """
+    Validates data (see validate_image()) and stores it under the SHA-256 of its content, so the
+    same image uploaded or fetched twice is stored once, and its URL never points at different
+    content. Raises ValidationError if data isn't an image in ORIGINAL_FORMATS.
+
+    Returns a StoredImage.
+    """
+    fmt = validate_image(data)
+    digest = hashlib.sha256(data).hexdigest()
+    name = _image_path(digest, f"original.{ORIGINAL_FORMATS[fmt]}")
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return StoredImage(digest, name, default_storage.url(name))
+
+
+def render_variants(stored):
+    """
+    Writes the JPEG and WebP variants of a stored image at every VARIANT_WIDTHS (images are
+    never enlarged). Variants that already exist are skipped.
+    """
+    with default_storage.open(stored.name) as f, Image.open(f) as original:
+        # Camera photos are often stored sideways with an EXIF orientation tag
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    for width in VARIANT_WIDTHS:
+        resized = None
+        for fmt, (extension, options) in VARIANT_FORMATS.items():
+            name = _image_path(stored.digest, f"{width}.{extension}")
+            if default_storage.exists(name):
+                continue
+            if resized is None:
+                resized = image.copy()
+                resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def read_source(source):
+    """
+    Returns the bytes of the image an Animal.image value points at: an http(s) URL, which is
+    downloaded, or a path under STATIC_URL, which is read from the static files. Raises
+    ValidationError if it can't be read.
+    """
+    parsed = urlparse(source)
+    if parsed.scheme in ("http", "https"):
+        try:
+            response = requests.get(source, timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as error:
+            raise ValidationError(f"Could not download {source}: {error}")
+        return response.content
+
+    static_url = "/" + settings.STATIC_URL.lstrip("/")
+    if parsed.path.startswith(static_url):
+        path = finders.find(parsed.path[len(static_url):])
+        if path:
+            with open(path, "rb") as f:
+                return f.read()
+    raise ValidationError(f"{source} is neither a URL nor a static file.")
+
+
+def set_animal_image(animal, data):
+    """
+    Stores the uploaded image data as the image of animal (not saved yet): animal.image points
+    at the original, and image_hash is cleared until the variants exist. Pass the result to
+    render_in_background() once the animal is saved.
+    """
+    stored = store_image(data)
+    animal.image = stored.url
+    animal.image_hash = ""
+    return stored
+
+
+def _finish(stored):
+    try:
+        render_variants(stored)
+        mark_rendered(stored)
+    finally:
+        # Every thread gets its own database connection; close it on the way out
+        connection.close()
+
+
+def ingest_source(source):
+    """
+    Stores the image an Animal.image value points at (see read_source()) and renders its
+    variants. Returns a StoredImage; raises ValidationError if the image can't be read.
+    """
+    stored = store_image(read_source(source))
+    render_variants(stored)
+    return stored
+
+
+def mark_rendered(stored, source=None):
+    """
+    Points every animal whose image is source (by default the original of stored) at stored,
+    whose variants must exist. The templates switch to the variants once image_hash is set.
+    Returns the number of animals changed.
+    """
+    animals = Animal.objects.filter(image=source or stored.url, image_hash="")
+    animal_ids = list(animals.values_list("id", flat=True))
+    animals.update(image=stored.url, image_hash=stored.digest)
+    # update() sends no signals
+    for pk in animal_ids:
+        invalidate_fragments("animal", pk)
+        animal_changed(pk)
+    return len(animal_ids)
+
+
+def render_in_background(stored):
+    """
+    Renders the variants of stored on the media thread pool once the current transaction
+    commits, then points the animals showing its original at them (see mark_rendered()).
+    """
+    transaction.on_commit(lambda: _executor.submit(_finish, stored))
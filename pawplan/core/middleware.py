@@ -0,0 +1,128 @@
+import time
+
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .instrumentation import RequestMetrics, _current_metrics, view_metrics
+from .models import Worker
+
+
+class QueryTimingMiddleware:
+    """
+    Records, for every request, the number of SQL queries, the time spent in SQL, the number of
+    duplicated queries, the template render time and the response size. The numbers are sent back
+    in a Server-Timing header (visible in the browser's network tab) and added to the rolling
+    per-view aggregate in core.instrumentation, which `manage.py view_metrics` reports.
+
+    This should be the first entry in MIDDLEWARE so that it covers the other middleware too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(metrics.record_query):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        total = time.perf_counter() - start
+
+        size = None if response.streaming else len(response.content)
+        response["Server-Timing"] = ", ".join(
+            [
+                f'sql;dur={metrics.sql_time * 1000:.1f};desc="{metrics.query_count} queries, '
+                f'{metrics.duplicate_queries} duplicates"',
+                f"tpl;dur={metrics.template_time * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+        match = request.resolver_match
+        if match is not None:
+            view_metrics.record(
+                match.view_name,
+                (
+                    round(total * 1000, 3),
+                    metrics.query_count,
+                    round(metrics.sql_time * 1000, 3),
+                    metrics.duplicate_queries,
+                    round(metrics.template_time * 1000, 3),
+                    size,
+                ),
+            )
+        return response
+
+
+class CurrentWorker:
+    """
+    The worker logged in to a request, read from the session the first time it's needed (so
+    requests that never ask don't load the session). login() stores the worker's id, role and
+    shelter in the session, so checking who is logged in takes no query. Sessions from before
+    those were stored (which only hold the worker's email, or lack the shelter) are upgraded
+    with one lookup on first use.
+
+    Attributes:
+    id: The logged-in worker's primary key, or None.
+    role: The logged-in worker's role (see Worker.ROLE_CHOICES), or None.
+    shelter_id: The primary key of the logged-in worker's shelter, or None. Scoped querysets
+        (see ShelterScopedQuerySet.for_request()) confine queries to it.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def _identity(self):
+        session = self.session
+        if session.get("is_valid") and "worker_shelter_id" not in session:
+            if "worker_id" in session:
+                workers = Worker.objects.filter(pk=session["worker_id"])
+            else:
+                workers = Worker.objects.filter(email=session.get("worker"))
+            worker = workers.only("id", "role", "shelter_id").first()
+            if worker is not None:
+                remember_worker(session, worker)
+        return (
+            session.get("worker_id"),
+            session.get("worker_role"),
+            session.get("worker_shelter_id"),
+        )
+
+    @cached_property
+    def id(self):
+        return self._identity()[0]
+
+    @cached_property
+    def role(self):
+        return self._identity()[1]
+
+    @cached_property
+    def shelter_id(self):
+        return self._identity()[2]
+
+
+class CurrentWorkerMiddleware:
+    """
+    Sets request.current_worker (a CurrentWorker), which views and templates use instead of
+    looking the worker up by email. Must come after SessionMiddleware in MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.current_worker = CurrentWorker(request.session)
+        return self.get_response(request)
+
+
+def remember_worker(session, worker):
+    """Stores the identity of a worker who just logged in in their session."""
+    session["is_valid"] = True
+    session["worker_id"] = worker.pk
+    session["worker_role"] = worker.role
+    session["worker_shelter_id"] = worker.shelter_id
+    session["is_manager"] = worker.role == Worker.MANAGER
+    session.pop("worker", None)
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.3 on 2026-10-18 12:43
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_task_due_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='modified_datetime',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='due_date',
+            field=models.DateTimeField(db_index=True, default=datetime.datetime(2026, 10, 25, 12, 43, 46, 972948, tzinfo=datetime.timezone.utc)),
+        ),
+    ]
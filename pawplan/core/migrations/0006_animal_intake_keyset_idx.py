@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_task_calendar_window'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['intake_date', 'id'], name='animal_intake_keyset_idx'),
+        ),
+    ]
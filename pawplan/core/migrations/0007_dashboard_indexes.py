@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_animal_intake_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['color', 'sex'], name='animal_color_sex_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['sex'], name='animal_sex_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['email'], name='person_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shelter',
+            index=models.Index(fields=['name'], name='shelter_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['completion_datetime'], name='task_completion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'completion_datetime'], name='task_assignee_completion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['animal', 'completion_datetime'], name='task_animal_completion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['creation_datetime'], name='task_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['title'], name='task_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completion_datetime__isnull', True)), fields=['due_date'], name='task_open_due_idx'),
+        ),
+    ]
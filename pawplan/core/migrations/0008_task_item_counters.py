@@ -0,0 +1,44 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:07
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+    TaskItem = apps.get_model("core", "TaskItem")
+
+    def item_count(**filters):
+        counts = (
+            TaskItem.objects.filter(task=OuterRef("pk"), **filters)
+            .order_by()
+            .values("task")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    # One UPDATE with correlated subqueries instead of a save() per task
+    Task.objects.update(items_total=item_count(), items_complete=item_count(is_complete=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='items_complete',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='items_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:40
+
+from django.db import migrations
+
+# Full-text index over animals, tasks, task items and comments, kept in sync by core/signals.py
+# and core/search.py. rowid = object id * 8 + kind code (see core.search.KIND_CODES).
+CREATE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE core_search_index USING fts5(
+        target_kind UNINDEXED,
+        target_id UNINDEXED,
+        title,
+        body,
+        tokenize = 'porter unicode61',
+        prefix = '2 3'
+    )
+    """,
+    # Rank title matches ten times higher than body matches
+    "INSERT INTO core_search_index (core_search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+]
+
+BACKFILL = [
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, title, body)
+    SELECT a.id * 8 + 1, 'animal', a.id, a.name,
+           a.description || ' ' || COALESCE(d.breed, c.breed, t.species, '')
+    FROM core_animal a
+    LEFT JOIN core_dog d ON d.animal_ptr_id = a.id
+    LEFT JOIN core_cat c ON c.animal_ptr_id = a.id
+    LEFT JOIN core_turtle t ON t.animal_ptr_id = a.id
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, title, body)
+    SELECT id * 8 + 2, 'task', id, title, description
+    FROM core_task
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, title, body)
+    SELECT id * 8 + 3, 'task', task_id, '', text
+    FROM core_taskitem
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, title, body)
+    SELECT c.id * 8 + 4, 'task', tc.task_id, '', c.text
+    FROM core_taskcomment tc JOIN core_comment c ON c.id = tc.comment_ptr_id
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, title, body)
+    SELECT c.id * 8 + 5, 'animal', ac.animal_id, '', c.text
+    FROM core_animalcomment ac JOIN core_comment c ON c.id = ac.comment_ptr_id
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_task_item_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, "DROP TABLE core_search_index"),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_address_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('PE', 'Pending'), ('RU', 'Running'), ('DO', 'Done'), ('FA', 'Failed')], default='PE', max_length=2)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim_token', models.CharField(blank=True, max_length=32)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_datetime', models.DateTimeField(auto_now_add=True)),
+                ('started_datetime', models.DateTimeField(blank=True, null=True)),
+                ('finished_datetime', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'PE')), fields=['run_after', 'id'], name='job_pending_idx'), models.Index(fields=['status', 'finished_datetime'], name='job_status_finished_idx'), models.Index(fields=['claim_token'], name='job_claim_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_job_queue'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_completion_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completion_datetime__isnull', False)), fields=['completion_datetime'], name='task_completion_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0012_task_completion_partial_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_creation_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_title_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_completion_idx',
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['shelter', 'name'], name='animal_shelter_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completion_datetime__isnull', False)), fields=['shelter', 'completion_datetime'], name='task_shelter_completion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completion_datetime__isnull', True)), fields=['shelter', 'due_date'], name='task_shelter_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['shelter', 'title'], name='task_shelter_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['shelter', 'creation_datetime'], name='task_shelter_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['shelter', 'due_date', 'modified_datetime', 'title'], name='task_shelter_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_shelter_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
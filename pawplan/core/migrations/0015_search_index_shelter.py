@@ -0,0 +1,77 @@
+# Generated by Django 5.0.3 on 2026-10-18 18:05
+
+import importlib
+
+from django.db import migrations
+
+# FTS5 tables can't gain columns, so the index is recreated with the shelter of every document,
+# which lets searches filter on it in the MATCH query instead of after it.
+CREATE_INDEX = [
+    "DROP TABLE core_search_index",
+    """
+    CREATE VIRTUAL TABLE core_search_index USING fts5(
+        target_kind UNINDEXED,
+        target_id UNINDEXED,
+        shelter_id UNINDEXED,
+        title,
+        body,
+        tokenize = 'porter unicode61',
+        prefix = '2 3'
+    )
+    """,
+    # bm25() takes one weight per column, unindexed ones included: title matches rank ten times
+    # higher than body matches
+    "INSERT INTO core_search_index (core_search_index, rank) "
+    "VALUES ('rank', 'bm25(0.0, 0.0, 0.0, 10.0, 1.0)')",
+]
+
+BACKFILL = [
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT a.id * 8 + 1, 'animal', a.id, a.shelter_id, a.name,
+           a.description || ' ' || COALESCE(d.breed, c.breed, t.species, '')
+    FROM core_animal a
+    LEFT JOIN core_dog d ON d.animal_ptr_id = a.id
+    LEFT JOIN core_cat c ON c.animal_ptr_id = a.id
+    LEFT JOIN core_turtle t ON t.animal_ptr_id = a.id
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT id * 8 + 2, 'task', id, shelter_id, title, description
+    FROM core_task
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT i.id * 8 + 3, 'task', i.task_id, t.shelter_id, '', i.text
+    FROM core_taskitem i JOIN core_task t ON t.id = i.task_id
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT c.id * 8 + 4, 'task', tc.task_id, t.shelter_id, '', c.text
+    FROM core_taskcomment tc
+    JOIN core_comment c ON c.id = tc.comment_ptr_id
+    JOIN core_task t ON t.id = tc.task_id
+    """,
+    """
+    INSERT INTO core_search_index (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT c.id * 8 + 5, 'animal', ac.animal_id, a.shelter_id, '', c.text
+    FROM core_animalcomment ac
+    JOIN core_comment c ON c.id = ac.comment_ptr_id
+    JOIN core_animal a ON a.id = ac.animal_id
+    """,
+]
+
+# Going back recreates the index the way 0009_search_index built it
+_initial = importlib.import_module("core.migrations.0009_search_index")
+REVERSE = ["DROP TABLE core_search_index", *_initial.CREATE_INDEX, *_initial.BACKFILL]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_animal_image_hash'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX + BACKFILL, REVERSE),
+    ]
@@ -1,7 +1,37 @@
-from django.db import models
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q
+from polymorphic.managers import PolymorphicManager
 from polymorphic.models import PolymorphicModel
+from polymorphic.query import PolymorphicQuerySet
 from django.utils import timezone
 import datetime
+import hashlib
+import re
+
+from .bulk import bulk_insert
+from .events import task_changed
+from .fragments import invalidate_fragments
+from .search import index_documents
+
+
+class AddressQuerySet(models.QuerySet):
+    def get_or_create_normalized(self, **fields):
+        """
+        Returns (address, created) for the given street1/street2/city/state/postal/country, reusing
+        an existing address that only differs in case, spacing or punctuation. This is a single
+        lookup on the unique fingerprint index instead of a filter over six text columns.
+        """
+        fingerprint = Address.compute_fingerprint(**fields)
+        address = self.filter(fingerprint=fingerprint).first()
+        if address is not None:
+            return address, False
+        try:
+            with transaction.atomic():
+                return self.create(**fields), True
+        except IntegrityError:
+            # Another request created the same address in the meantime
+            return self.get(fingerprint=fingerprint), False
 
 
 class Address(models.Model):
@@ -16,14 +46,63 @@ class Address(models.Model):
     state: A string representing the state of the address (max length is ).
     postal: A string representing the postal code of the address.
     country: A string representing the country of the address.
+    fingerprint: The SHA-256 of the normalized address fields (see compute_fingerprint), set on
+        save. Unique, so that the intake forms can find an existing address with one index
+        lookup. Null for addresses that predate it until `manage.py dedupe_addresses` runs.
     """
 
+    FIELDS = ("street1", "street2", "city", "state", "postal", "country")
+
     street1 = models.TextField(max_length=30)
     street2 = models.TextField(max_length=30, null=True)
     city = models.TextField(max_length=30)
     state = models.TextField(max_length=2)
     postal = models.TextField(max_length=20)
     country = models.TextField(max_length=10)
+    fingerprint = models.CharField(max_length=64, unique=True, null=True, editable=False)
+
+    objects = AddressQuerySet.as_manager()
+
+    @staticmethod
+    def compute_fingerprint(**fields):
+        """
+        Hashes the address fields after normalizing them: case, punctuation and runs of
+        whitespace are ignored, and a missing street2 equals an empty one. So "1700 Rowan Blvd."
+        and "1700  rowan blvd" get the same fingerprint.
+        """
+        parts = []
+        for name in Address.FIELDS:
+            value = re.sub(r"[^\w\s]", "", str(fields.get(name) or "").lower())
+            parts.append(" ".join(value.split()))
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    def validate_unique(self, exclude=None):
+        """
+        Also rejects an address whose fingerprint another address already has. The fingerprint
+        isn't editable, so model forms (like the admin's) would otherwise only find out from the
+        IntegrityError in save().
+        """
+        super().validate_unique(exclude)
+        duplicates = Address.objects.filter(
+            fingerprint=Address.compute_fingerprint(
+                **{name: getattr(self, name) for name in Address.FIELDS}
+            )
+        )
+        if self.pk is not None:
+            duplicates = duplicates.exclude(pk=self.pk)
+        if duplicates.exists():
+            raise ValidationError(
+                {NON_FIELD_ERRORS: ["This address already exists (ignoring case and punctuation)."]}
+            )
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = Address.compute_fingerprint(
+            **{name: getattr(self, name) for name in Address.FIELDS}
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(Address.FIELDS):
+            kwargs["update_fields"] = {*update_fields, "fingerprint"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.street1}, {self.city}, {self.state} {self.postal}"
@@ -46,10 +125,46 @@ class Shelter(models.Model):
     email_address = models.EmailField()
     address = models.ForeignKey(Address, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # animals filters on shelter__name
+            models.Index(fields=["name"], name="shelter_name_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class ShelterScopedQuerySet:
+    """
+    Mixin for the querysets of models with a shelter foreign key. Every shelter shares one
+    database, so the views a worker uses confine their queries to the worker's shelter with
+    for_request(); the shelter_id predicate leads the composite indexes of those models.
+    """
+
+    def for_shelter(self, shelter_id):
+        """The rows that belong to one shelter (none if shelter_id is None)."""
+        if shelter_id is None:
+            return self.none()
+        return self.filter(shelter_id=shelter_id)
+
+    def for_request(self, request):
+        """
+        The rows that belong to the shelter of the worker logged in to request (see
+        CurrentWorker in core/middleware.py), or none if no worker is logged in.
+        """
+        return self.for_shelter(request.current_worker.shelter_id)
+
+
+class PersonQuerySet(PolymorphicQuerySet):
+    def for_list(self):
+        """
+        Lightweight list mode: skips the polymorphic upcast (one extra query per subclass
+        content type) since list templates only read fields shared by every subclass.
+        """
+        return self.non_polymorphic()
+
+
 class Person(PolymorphicModel):
     """
     The Person class implements the PolyMorphicModel class and represents a person. This is a
@@ -69,10 +184,22 @@ class Person(PolymorphicModel):
     email = models.CharField(max_length=100)
     address = models.ForeignKey(Address, on_delete=models.CASCADE)
 
+    objects = PolymorphicManager.from_queryset(PersonQuerySet)()
+
+    class Meta(PolymorphicModel.Meta):
+        indexes = [
+            # login, swap_task and the comment views look workers up by email
+            models.Index(fields=["email"], name="person_email_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class StaffQuerySet(ShelterScopedQuerySet, PersonQuerySet):
+    """The queryset of Worker and Volunteer, the people who belong to a shelter."""
+
+
 class Worker(Person):
     """
     The Worker class represents a worker at an animal shelter. It is a subclass of the Person
@@ -97,6 +224,8 @@ class Worker(Person):
     hire_date = models.DateField()
     shelter = models.ForeignKey(Shelter, on_delete=models.CASCADE)
 
+    objects = PolymorphicManager.from_queryset(StaffQuerySet)()
+
 
 class Adopter(Person):
     """
@@ -122,6 +251,18 @@ class Volunteer(Person):
     start_date = models.DateField()
     shelter = models.ForeignKey(Shelter, on_delete=models.CASCADE)
 
+    objects = PolymorphicManager.from_queryset(StaffQuerySet)()
+
+
+class AnimalQuerySet(ShelterScopedQuerySet, PolymorphicQuerySet):
+    def for_list(self):
+        """
+        Lightweight list mode: returns plain Animal instances without the polymorphic upcast and
+        loads only Animal.LIST_FIELDS. Subclass fields such as breed or species are left for the
+        detail pages, which use the regular polymorphic queryset.
+        """
+        return self.non_polymorphic().only(*Animal.LIST_FIELDS)
+
 
 class Animal(PolymorphicModel):
     """
@@ -130,7 +271,7 @@ class Animal(PolymorphicModel):
     Cat, or Turtle (polymorphism). It is referenced by the Task and AnimalComment classes.
 
     NOTE: The .save() method has been overridden to automatically create tasks for the animal when
-    it is first saved. This base implementation has an empty list of AUTOMATIC_TASKS, but subclasses
+    it is first saved (in the same transaction, with bulk inserts). This base implementation has an empty list of AUTOMATIC_TASKS, but subclasses
     like Cat and Dog will override this attribute to include tasks specific to those animals. The
     overriden AUTOMATIC_TASKS attributes should be a list of dicts of the following form:
 
@@ -141,7 +282,9 @@ class Animal(PolymorphicModel):
     color: A string representing the color of the animal.
     intake_type: A string representing the type of intake ("C" for captured or "S" for surrendered).
     intake_date: A date representing the date the animal was taken in by the shelter (defaults to now).
-    image: An image representing the animal (optional).
+    image: The URL of an image representing the animal (optional).
+    image_hash: The SHA-256 of the animal's image once it has been stored locally and its resized
+        variants rendered (see core/media.py), or empty while templates should show image as is.
     age: An integer representing the age of the animal (optional).
     description: A string representing the description of the animal.
     sex: A string reprensenting the sex of the animal ("M" or "F")
@@ -163,17 +306,34 @@ class Animal(PolymorphicModel):
 
     AUTOMATIC_TASKS = []
 
+    # The columns list templates (cards, dropdowns, the public browser) read
+    LIST_FIELDS = ("id", "name", "image", "image_hash", "description", "intake_date")
+
     name = models.CharField(max_length=100)
     color = models.CharField(max_length=30)
     intake_type = models.CharField(max_length=1, choices=INTAKE_CHOICES, blank=True)
     intake_date = models.DateTimeField(default=timezone.now)
     image = models.CharField(max_length=300)
+    image_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
     age = models.IntegerField(null=True)
     description = models.TextField()
     sex = models.CharField(max_length=1, choices=SEX_CHOICES, blank=True)
     ready_to_adopt = models.BooleanField()
     shelter = models.ForeignKey(Shelter, on_delete=models.CASCADE)
 
+    objects = PolymorphicManager.from_queryset(AnimalQuerySet)()
+
+    class Meta(PolymorphicModel.Meta):
+        indexes = [
+            # Supports the (intake_date, id) keyset pagination of the public animal browser
+            models.Index(fields=["intake_date", "id"], name="animal_intake_keyset_idx"),
+            # The color/sex filters of animals and filter_animals
+            models.Index(fields=["color", "sex"], name="animal_color_sex_idx"),
+            models.Index(fields=["sex"], name="animal_sex_idx"),
+            # The dashboard animal list, scoped to the worker's shelter and sorted by name
+            models.Index(fields=["shelter", "name"], name="animal_shelter_name_idx"),
+        ]
+
     @property
     def animal_type(self):
         """Returns the class name as a string."""
@@ -181,23 +341,35 @@ class Animal(PolymorphicModel):
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        if is_new:
-            for task_outline in self.AUTOMATIC_TASKS:
-                automatic_task = Task.objects.create(
-                    title=task_outline["title"],
-                    description=task_outline["description"],
-                    shelter=self.shelter,
-                    required_role=task_outline["required_role"],
-                    animal=self,
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                Animal.create_automatic_tasks([self])
+
+    @staticmethod
+    def create_automatic_tasks(animals):
+        """
+        Creates the AUTOMATIC_TASKS (and their single TaskItem) for every animal in the list with
+        Task.bulk_create_with_items(), so the number of INSERTs doesn't depend on how many animals
+        or tasks there are. The animals must already be saved. Used by save() and by the batch
+        intake in core/intake.py.
+        """
+        tasks = []
+        descriptions = []
+        for animal in animals:
+            for task_outline in animal.AUTOMATIC_TASKS:
+                tasks.append(
+                    Task(
+                        title=task_outline["title"],
+                        description=task_outline["description"],
+                        shelter_id=animal.shelter_id,
+                        required_role=task_outline["required_role"],
+                        animal=animal,
+                    )
                 )
-                automatic_task.save()
+                descriptions.append([task_outline["description"]])
 
-                task_item = TaskItem.objects.create(item_number=1,
-                                                    text=task_outline["description"],
-                                                    is_complete=False,
-                                                    task=automatic_task)
-                task_item.save()
+        return Task.bulk_create_with_items(tasks, descriptions)
 
     def __str__(self):
         return self.name
@@ -327,6 +499,37 @@ class Turtle(Animal):
     species = models.CharField(max_length=30)
 
 
+class TaskQuerySet(ShelterScopedQuerySet, models.QuerySet):
+    def visible_to(self, is_manager):
+        """
+        The tasks a worker sees on the dashboard: managers see every task, everyone else only
+        the tasks that have been assigned to someone.
+        """
+        if is_manager:
+            return self
+        return self.filter(assignee__isnull=False)
+
+    def with_progress(self):
+        """
+        Annotates each task with the total number of its TaskItems (item_count) and the number of
+        those that are complete (item_complete_count), so progress can be read for a whole list of
+        tasks in a single query instead of two queries per task.
+        """
+        return self.annotate(
+            item_count=Count("taskitem"),
+            item_complete_count=Count("taskitem", filter=Q(taskitem__is_complete=True)),
+        )
+
+    def with_drifted_counters(self):
+        """
+        Returns the tasks whose items_total/items_complete counters disagree with their actual
+        TaskItems, annotated by with_progress() with the correct values.
+        """
+        return self.with_progress().filter(
+            ~Q(items_total=F("item_count")) | ~Q(items_complete=F("item_complete_count"))
+        )
+
+
 class Task(models.Model):
     """
     Concrete base implementation of a task.
@@ -340,9 +543,16 @@ class Task(models.Model):
     completion_datetime: A datetime representing the date and time the task was completed (null
         if not completed).
     creation_datetime: A datetime representing the date and time the task was created.
+    modified_datetime: A datetime representing the last time the task was saved.
     required_role: A string representing the role required to complete the task.
     is_completed: A boolean representing whether the task is completed (uses @property wrapper to
         treat a method like an attribute).
+    items_total: The number of TaskItems belonging to the task. A counter kept up to date by
+        add_items() and TaskItem.mark_complete(); repair_task_counters fixes any drift.
+    items_complete: The number of completed TaskItems belonging to the task (counter, see
+        items_total).
+    num_items: Alias for items_total.
+    num_items_complete: Alias for items_complete.
     """
 
     MANAGER = "MA"
@@ -362,12 +572,56 @@ class Task(models.Model):
     shelter = models.ForeignKey(Shelter, on_delete=models.CASCADE)
     assignee = models.ForeignKey(Worker, on_delete=models.CASCADE, null=True)
     # If a due_date is not specified, it defaults to seven days from the creation time
-    due_date = models.DateTimeField(default=timezone.now() + datetime.timedelta(days=7))
+    due_date = models.DateTimeField(
+        default=timezone.now() + datetime.timedelta(days=7), db_index=True
+    )
     completion_datetime = models.DateTimeField(blank=True, null=True)
     creation_datetime = models.DateTimeField(auto_now_add=True)
+    modified_datetime = models.DateTimeField(auto_now=True)
     required_role = models.CharField(max_length=2, choices=REQUIRED_ROLE_CHOICES)
     animal = models.ForeignKey(Animal, on_delete=models.CASCADE, null=True)
     is_released = models.BooleanField(default=False)
+    items_total = models.PositiveIntegerField(default=0)
+    items_complete = models.PositiveIntegerField(default=0)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The dashboard task windows are scoped to the worker's shelter (for_request()), so
+            # their indexes lead with shelter_id. Completed tasks, most recent first; partial, so
+            # the planner can't pick it for the open-task lists and sort every open task.
+            models.Index(
+                fields=["shelter", "completion_datetime"],
+                condition=Q(completion_datetime__isnull=False),
+                name="task_shelter_completion_idx",
+            ),
+            # Open tasks by due date, the default dashboard view
+            models.Index(
+                fields=["shelter", "due_date"],
+                condition=Q(completion_datetime__isnull=True),
+                name="task_shelter_open_due_idx",
+            ),
+            # The other sort_tasks orderings
+            models.Index(fields=["shelter", "title"], name="task_shelter_title_idx"),
+            models.Index(
+                fields=["shelter", "creation_datetime"], name="task_shelter_creation_idx"
+            ),
+            # The calendar feed's due date window. It covers the feed (title) and its ETag
+            # (modified_datetime), and being wider than task_shelter_open_due_idx keeps the planner
+            # on that one for the open-task windows.
+            models.Index(
+                fields=["shelter", "due_date", "modified_datetime", "title"],
+                name="task_shelter_due_idx",
+            ),
+            # filter_tasks: assignee or animal, with the completion status
+            models.Index(
+                fields=["assignee", "completion_datetime"], name="task_assignee_completion_idx"
+            ),
+            models.Index(
+                fields=["animal", "completion_datetime"], name="task_animal_completion_idx"
+            ),
+        ]
 
     @property
     def is_completed(self):
@@ -378,13 +632,57 @@ class Task(models.Model):
         
     @property
     def num_items(self):
-        items = TaskItem.objects.filter(task=self.id)
-        return len(items)
-    
+        return self.items_total
+
     @property
     def num_items_complete(self):
-        items = TaskItem.objects.filter(task=self.id, is_complete=True)
-        return len(items)
+        return self.items_complete
+
+    @staticmethod
+    def bulk_create_with_items(tasks, item_texts):
+        """
+        Saves unsaved tasks together with their TaskItems in one transaction with two bulk
+        INSERTs (plus the search index rows, since bulk_create() skips the signals that would
+        add them). item_texts holds one list of item texts per task; items_total is set to match.
+        Returns the tasks.
+        """
+        items = []
+        for task, texts in zip(tasks, item_texts):
+            task.items_total = len(texts)
+            items.extend(
+                TaskItem(item_number=n + 1, text=text, is_complete=False, task=task)
+                for n, text in enumerate(texts)
+            )
+        with transaction.atomic():
+            bulk_insert(tasks)
+            bulk_insert(items)
+            index_documents("task", tasks, replace=False)
+            index_documents("taskitem", items, replace=False)
+        return tasks
+
+    def add_items(self, texts):
+        """
+        Appends a TaskItem for every string in texts, numbered after the existing items, and bumps
+        items_total in the same transaction. The counter is incremented in SQL and the items are
+        numbered from the total read back after it, so both stay right even if the instance is
+        stale. The task must already be saved.
+        """
+        texts = list(texts)
+        with transaction.atomic():
+            tasks = Task.objects.filter(pk=self.pk)
+            tasks.update(items_total=F("items_total") + len(texts))
+            # The UPDATE holds the write lock until commit, so no one else can add items between
+            # it and this read
+            total = tasks.values_list("items_total", flat=True).get()
+            first = total - len(texts) + 1
+            items = TaskItem.objects.bulk_create(
+                TaskItem(item_number=first + n, text=text, is_complete=False, task=self)
+                for n, text in enumerate(texts)
+            )
+            index_documents("taskitem", items, replace=False)
+            invalidate_fragments("task", self.pk)
+            task_changed(self.pk)
+        self.items_total = total
 
     def __str__(self):
         return self.title
@@ -395,6 +693,24 @@ class TaskItem(models.Model):
     is_complete = models.BooleanField()
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
 
+    @staticmethod
+    def mark_complete(item_id):
+        """
+        Marks the item complete and bumps its task's items_complete counter in one transaction.
+        Completing an item that is already complete (or does not exist) changes nothing, so a
+        double-submitted form cannot overcount. Returns True if the item was changed.
+        """
+        with transaction.atomic():
+            # The is_complete=False filter makes the UPDATE itself the guard against counting twice
+            if not TaskItem.objects.filter(pk=item_id, is_complete=False).update(is_complete=True):
+                return False
+            task_id = TaskItem.objects.values_list("task_id", flat=True).get(pk=item_id)
+            Task.objects.filter(pk=task_id).update(items_complete=F("items_complete") + 1)
+            # update() sends no signals, so the cached markup is retired here
+            invalidate_fragments("task", task_id)
+            task_changed(task_id)
+        return True
+
 
 class Comment(models.Model):
     """
@@ -435,3 +751,62 @@ class AnimalComment(Comment):
     """
 
     animal = models.ForeignKey(Animal, on_delete=models.CASCADE)
+
+
+class Job(models.Model):
+    """
+    A unit of background work in the local job queue (see core/jobs.py), processed by
+    `manage.py run_jobs`.
+
+    Attributes:
+    kind: A string naming the registered handler that processes the job (e.g. "intake.adoption").
+    payload: The JSON-serializable arguments of the job.
+    status: One of PENDING, RUNNING, DONE or FAILED.
+    attempts: How many times the job has been tried.
+    max_attempts: How many tries the job gets before it is marked FAILED.
+    run_after: A datetime before which the job is not picked up (used to back off retries).
+    claim_token: Identifies the worker batch that claimed the job while it is RUNNING.
+    last_error: The error of the most recent failed attempt.
+    created_datetime: A datetime representing when the job was enqueued.
+    started_datetime: A datetime representing when the job was last claimed.
+    finished_datetime: A datetime representing when the job was marked DONE or FAILED.
+    """
+
+    PENDING = "PE"
+    RUNNING = "RU"
+    DONE = "DO"
+    FAILED = "FA"
+
+    STATUS_CHOICES = {
+        PENDING: "Pending",
+        RUNNING: "Running",
+        DONE: "Done",
+        FAILED: "Failed",
+    }
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_datetime = models.DateTimeField(auto_now_add=True)
+    started_datetime = models.DateTimeField(null=True, blank=True)
+    finished_datetime = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: the oldest due pending jobs
+            models.Index(
+                fields=["run_after", "id"],
+                condition=Q(status="PE"),
+                name="job_pending_idx",
+            ),
+            models.Index(fields=["status", "finished_datetime"], name="job_status_finished_idx"),
+            models.Index(fields=["claim_token"], name="job_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,154 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    One window of results returned by keyset_paginate(). It is iterable like a Paginator page,
+    but instead of page numbers it exposes opaque cursors for the neighbouring windows.
+
+    Attributes:
+    object_list: A list of the model instances in this window.
+    next_cursor: A cursor to pass as 'after' to fetch the next window (None if this is the last).
+    previous_cursor: A cursor to pass as 'before' to fetch the previous window (None if this is
+        the first).
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def encode_cursor(obj, ordering):
+    """Encodes the ordering values of obj as an opaque, URL-safe cursor string."""
+    model = type(obj)
+    values = [
+        getattr(obj, model._meta.get_field(name).attname)
+        for name, _ in _parse_ordering(ordering)
+    ]
+    # isoformat() keeps full microsecond precision, which DjangoJSONEncoder would truncate
+    values = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Decodes a cursor produced by encode_cursor() back into typed field values. Returns None for
+    a missing or malformed cursor so callers can fall back to the first window.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        fields = _parse_ordering(ordering)
+        if len(values) != len(fields):
+            return None
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek_filter(ordering, values, backwards):
+    """
+    Builds the row-value comparison "(f1, f2, ...) > (v1, v2, ...)" as nested Q objects, taking
+    the direction of each ordering field into account, as "f1 >= v1 AND (f1 > v1 OR ...)".
+    """
+    condition = Q()
+    equal_prefix = Q()
+    fields = _parse_ordering(ordering)
+    for (name, descending), value in zip(fields, values):
+        # "after" a value means greater for ascending fields and smaller for descending ones;
+        # seeking backwards flips the comparison.
+        lookup = "lt" if descending != backwards else "gt"
+        condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+        equal_prefix &= Q(**{name: value})
+    # The redundant bound on the leading field lets SQLite seek the index once and walk it in
+    # order. Without it the planner may split the ORs into separate index lookups and then sort
+    # every matching row to apply the LIMIT.
+    name, descending = fields[0]
+    lookup = "lte" if descending != backwards else "gte"
+    return Q(**{f"{name}__{lookup}": values[0]}) & condition
+
+
+def keyset_paginate(queryset, ordering, per_page, after=None, before=None):
+    """
+    Returns a KeysetPage of at most per_page rows from queryset, ordered by the given fields.
+    Unlike Paginator, this never runs a COUNT(*) or an OFFSET scan: each window is a single
+    indexed range query that seeks past the cursor. The ordering fields must be non-null local
+    fields that together are unique (end with "id"/"-id").
+
+    Arguments:
+    queryset: The (already filtered) queryset to page through.
+    ordering: A tuple of field names, optionally prefixed with "-", e.g. ("-intake_date", "-id").
+    per_page: The number of rows in a window.
+    after: A cursor from a previous page's next_cursor.
+    before: A cursor from a previous page's previous_cursor (takes precedence over after).
+    """
+    model = queryset.model
+    before_values = decode_cursor(before, model, ordering)
+    after_values = None if before_values else decode_cursor(after, model, ordering)
+
+    if before_values:
+        reverse_ordering = [
+            name[1:] if name.startswith("-") else f"-{name}" for name in ordering
+        ]
+        rows = list(
+            queryset.filter(_seek_filter(ordering, before_values, backwards=True))
+            .order_by(*reverse_ordering)[: per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after_values:
+            queryset = queryset.filter(_seek_filter(ordering, after_values, backwards=False))
+        rows = list(queryset.order_by(*ordering)[: per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_values is not None
+
+    next_cursor = encode_cursor(rows[-1], ordering) if rows and has_next else None
+    previous_cursor = encode_cursor(rows[0], ordering) if rows and has_previous else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def cached_count(queryset, key_parts, timeout=60):
+    """
+    Returns an approximate row count for queryset, cached for timeout seconds under a key built
+    from key_parts (e.g. the filter combination). The count may lag behind recent writes by up
+    to timeout seconds, which is fine for "about N results" displays.
+    """
+    digest = hashlib.md5(
+        json.dumps(key_parts, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+    key = f"count:{queryset.model._meta.label_lower}:{digest}"
+    return cache.get_or_set(key, queryset.count, timeout)
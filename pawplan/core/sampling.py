@@ -0,0 +1,48 @@
+import random
+
+from django.db.models import Max
+
+from .models import Animal
+
+# Each probe round draws this many random ids per animal still missing, so that a round usually
+# fills the sample even when ids have gaps from deleted rows
+PROBE_FACTOR = 4
+PROBE_ROUNDS = 3
+
+
+def random_animals(count, ready_to_adopt=False):
+    """
+    Returns up to count randomly chosen animals, in random order (only adoptable animals if
+    ready_to_adopt is True). Replaces order_by("?"), which makes the database sort the whole
+    table on every call: here random ids are drawn between 1 and MAX(id) (read from the primary
+    key index) and looked up by primary key in a few bounded probe rounds, so the cost stays flat
+    as the table grows and nothing has to be cached or invalidated when animals change. If the
+    probes come up short (a sparse table or few adoptable animals), the rest is filled with an
+    index range scan from a random id. The animals are loaded in list mode (see
+    AnimalQuerySet.for_list()).
+    """
+    animals = Animal.objects.for_list().order_by()
+    if ready_to_adopt:
+        animals = animals.filter(ready_to_adopt=True)
+    max_id = Animal.objects.non_polymorphic().aggregate(max_id=Max("id"))["max_id"]
+    if not max_id or count <= 0:
+        return []
+    chosen = {}
+    for _ in range(PROBE_ROUNDS):
+        missing = count - len(chosen)
+        if not missing:
+            break
+        probes = {random.randint(1, max_id) for _ in range(missing * PROBE_FACTOR)} - chosen.keys()
+        for animal in animals.filter(id__in=probes)[:missing]:
+            chosen[animal.pk] = animal
+    start = random.randint(1, max_id)
+    for lookup in ("id__gte", "id__lt"):
+        missing = count - len(chosen)
+        if not missing:
+            break
+        rest = animals.exclude(id__in=chosen).filter(**{lookup: start}).order_by("id")
+        for animal in rest[:missing]:
+            chosen[animal.pk] = animal
+    sample = list(chosen.values())
+    random.shuffle(sample)
+    return sample
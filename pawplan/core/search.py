@@ -0,0 +1,205 @@
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# The FTS5 virtual table created by migration 0009_search_index
+SEARCH_TABLE = "core_search_index"
+
+# Every searchable object is one row of SEARCH_TABLE. Its rowid is derived from the object's
+# primary key and kind, so a single object can be replaced or removed with an indexed rowid lookup
+# instead of a scan. target_kind/target_id name the task or animal a search result links to:
+# items and comments link to the task or animal they belong to.
+KIND_CODES = {
+    "animal": 1,
+    "task": 2,
+    "taskitem": 3,
+    "taskcomment": 4,
+    "animalcomment": 5,
+}
+KIND_SLOTS = 8
+
+# snippet() wraps the matched terms in these, and they are turned into <mark> after escaping
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+# SQLite allows at most 999 parameters per statement and a document row has six
+INSERT_BATCH_SIZE = 166
+
+SearchHit = namedtuple("SearchHit", ["kind", "target_kind", "target_id", "snippet"])
+
+
+def document_rowid(kind, pk):
+    return pk * KIND_SLOTS + KIND_CODES[kind]
+
+
+def _document(kind, obj):
+    """
+    Returns the (rowid, target_kind, target_id, shelter_id, title, body) row that indexes obj.
+    Items and comments take the shelter of their task or animal, which is loaded if it isn't
+    cached on obj already.
+    """
+    rowid = document_rowid(kind, obj.pk)
+    if kind == "animal":
+        # breed (Dog, Cat) and species (Turtle) only exist on the subclasses
+        extra = getattr(obj, "breed", "") or getattr(obj, "species", "") or ""
+        body = f"{obj.description} {extra}".strip()
+        return (rowid, "animal", obj.pk, obj.shelter_id, obj.name, body)
+    if kind == "task":
+        return (rowid, "task", obj.pk, obj.shelter_id, obj.title, obj.description)
+    if kind in ("taskitem", "taskcomment"):
+        return (rowid, "task", obj.task_id, obj.task.shelter_id, "", obj.text)
+    return (rowid, "animal", obj.animal_id, obj.animal.shelter_id, "", obj.text)
+
+
+def index_documents(kind, objs, replace=True):
+    """
+    Adds (or, with replace=True, re-indexes) saved objects of the given kind. Pass
+    replace=False for objects that were just created to skip the DELETE. Used by the signal
+    receivers and by the bulk paths, which skip signals.
+    """
+    rows = [_document(kind, obj) for obj in objs]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[start:start + INSERT_BATCH_SIZE]
+            if replace:
+                cursor.execute(
+                    f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(batch))})",
+                    [row[0] for row in batch],
+                )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} "
+                "(rowid, target_kind, target_id, shelter_id, title, body) VALUES "
+                + ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(batch)),
+                [value for row in batch for value in row],
+            )
+
+
+def remove_documents(kind, pks):
+    pks = list(pks)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), INSERT_BATCH_SIZE):
+            batch = pks[start:start + INSERT_BATCH_SIZE]
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(batch))})",
+                [document_rowid(kind, pk) for pk in batch],
+            )
+
+
+# Rebuilds every document straight from the app tables, one INSERT ... SELECT per kind
+REBUILD_SQL = [
+    f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT a.id * {KIND_SLOTS} + {KIND_CODES["animal"]}, 'animal', a.id, a.shelter_id, a.name,
+           a.description || ' ' || COALESCE(d.breed, c.breed, t.species, '')
+    FROM core_animal a
+    LEFT JOIN core_dog d ON d.animal_ptr_id = a.id
+    LEFT JOIN core_cat c ON c.animal_ptr_id = a.id
+    LEFT JOIN core_turtle t ON t.animal_ptr_id = a.id
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT id * {KIND_SLOTS} + {KIND_CODES["task"]}, 'task', id, shelter_id, title, description
+    FROM core_task
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT i.id * {KIND_SLOTS} + {KIND_CODES["taskitem"]}, 'task', i.task_id, t.shelter_id, '',
+           i.text
+    FROM core_taskitem i JOIN core_task t ON t.id = i.task_id
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT c.id * {KIND_SLOTS} + {KIND_CODES["taskcomment"]}, 'task', tc.task_id, t.shelter_id,
+           '', c.text
+    FROM core_taskcomment tc
+    JOIN core_comment c ON c.id = tc.comment_ptr_id
+    JOIN core_task t ON t.id = tc.task_id
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, target_kind, target_id, shelter_id, title, body)
+    SELECT c.id * {KIND_SLOTS} + {KIND_CODES["animalcomment"]}, 'animal', ac.animal_id,
+           a.shelter_id, '', c.text
+    FROM core_animalcomment ac
+    JOIN core_comment c ON c.id = ac.comment_ptr_id
+    JOIN core_animal a ON a.id = ac.animal_id
+    """,
+]
+
+
+def rebuild_index():
+    """Drops every document and re-indexes all animals, tasks, items and comments."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+        # Merge the index b-trees written by the bulk insert into one
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def match_expression(text):
+    """
+    Turns what a worker typed into an FTS5 query: every word must match, and the last one may be
+    a prefix (so results show up while typing). Words are quoted, so FTS5 operators and stray
+    punctuation in the input can't cause syntax errors. Returns None if there is nothing to search.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+    )
+
+
+def search(text, shelter_id, page=1, per_page=20):
+    """
+    Runs a ranked full-text search over the animals, tasks, task items and comments of one
+    shelter. The shelter is filtered in the same query, so every page is full but the last.
+
+    Results are ordered by bm25, with title matches weighted above body matches. Returns
+    (hits, has_next). hits is a list of SearchHit, each holding:
+    - the kind of document that matched
+    - the task or animal to link to
+    - an HTML-safe snippet with the matches in <mark>
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return [], False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid, target_kind, target_id,
+                   snippet({SEARCH_TABLE}, -1, %s, %s, '…', 12)
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH %s AND shelter_id = %s
+            ORDER BY rank
+            LIMIT %s OFFSET %s
+            """,
+            [
+                MATCH_START,
+                MATCH_END,
+                expression,
+                shelter_id,
+                per_page + 1,
+                (page - 1) * per_page,
+            ],
+        )
+        rows = cursor.fetchall()
+
+    codes = {code: kind for kind, code in KIND_CODES.items()}
+    hits = [
+        SearchHit(codes[rowid % KIND_SLOTS], target_kind, target_id, _highlight(snippet))
+        for rowid, target_kind, target_id, snippet in rows[:per_page]
+    ]
+    return hits, len(rows) > per_page
@@ -0,0 +1,79 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import animal_changed, task_changed
+from .facets import invalidate_animal_facets
+from .fragments import invalidate_all_fragments, invalidate_fragments
+from .models import (
+    Animal,
+    AnimalComment,
+    Shelter,
+    Task,
+    TaskComment,
+    TaskItem,
+    Volunteer,
+    Worker,
+)
+from .search import index_documents, remove_documents
+
+
+@receiver([post_save, post_delete])
+def animal_or_shelter_changed(sender, instance, **kwargs):
+    # Animal subclasses send signals with sender=Dog/Cat/Turtle, so match on the instance instead
+    if isinstance(instance, (Animal, Shelter)):
+        invalidate_animal_facets()
+
+
+@receiver([post_save, post_delete])
+def push_dashboard_card(sender, instance, **kwargs):
+    # Tells connected dashboards to refetch the card of the changed task or animal
+    if isinstance(instance, Task):
+        task_changed(instance.pk)
+    elif isinstance(instance, TaskItem):
+        task_changed(instance.task_id)
+    elif isinstance(instance, Animal):
+        animal_changed(instance.pk)
+
+
+@receiver([post_save, post_delete])
+def invalidate_cached_fragments(sender, instance, **kwargs):
+    # Retires the cached card and modal markup of the task or animal the instance belongs to
+    if isinstance(instance, Task):
+        invalidate_fragments("task", instance.pk)
+    elif isinstance(instance, (TaskItem, TaskComment)):
+        invalidate_fragments("task", instance.task_id)
+    elif isinstance(instance, Animal):
+        invalidate_fragments("animal", instance.pk)
+    elif isinstance(instance, AnimalComment):
+        invalidate_fragments("animal", instance.animal_id)
+    elif isinstance(instance, (Shelter, Worker, Volunteer)):
+        # Shelter and people's names are shown on many fragments
+        invalidate_all_fragments()
+
+
+# Models in the full-text search index, by the document kind they are indexed as
+SEARCH_KINDS = [
+    (Animal, "animal"),
+    (Task, "task"),
+    (TaskItem, "taskitem"),
+    (TaskComment, "taskcomment"),
+    (AnimalComment, "animalcomment"),
+]
+
+
+@receiver(post_save)
+def index_searchable(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    for model, kind in SEARCH_KINDS:
+        if isinstance(instance, model):
+            index_documents(kind, [instance], replace=not created)
+            return
+
+
+@receiver(post_delete)
+def unindex_searchable(sender, instance, **kwargs):
+    for model, kind in SEARCH_KINDS:
+        if isinstance(instance, model):
+            remove_documents(kind, [instance.pk])
+            return
@@ -0,0 +1,15 @@
+from django import template
+
+from ..fragments import fragment_version
+
+register = template.Library()
+
+
+@register.filter(name="fragment_version")
+def fragment_version_filter(obj, kind):
+    """
+    The version stamp of obj's cached fragments, as a {% cache %} key part:
+
+        {% cache None task_card task.id task|fragment_version:"task" %}
+    """
+    return fragment_version(kind, obj.pk)
@@ -0,0 +1,24 @@
+from django import template
+
+from ..media import PREVIEW_WIDTH, THUMBNAIL_WIDTH, picture
+
+register = template.Library()
+
+SIZES = {"thumbnail": THUMBNAIL_WIDTH, "preview": PREVIEW_WIDTH}
+
+
+@register.inclusion_tag("partials/animal_picture.html")
+def animal_picture(animal, size="thumbnail", css_class=""):
+    """
+    Renders an animal's image at size ("thumbnail" or "preview") as a <picture> that offers
+    browsers the WebP variant and falls back to the JPEG one:
+
+        {% animal_picture animal "thumbnail" "card-img-top" %}
+
+    Animals whose image hasn't been stored locally yet get a plain <img> of animal.image.
+    """
+    return {
+        "animal": animal,
+        "picture": picture(animal.image_hash, SIZES[size]) if animal.image_hash else None,
+        "css_class": css_class,
+    }
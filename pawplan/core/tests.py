@@ -1,3 +1,958 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.forms import modelform_factory
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import events
+from .benchmarks import check_budgets, load_budgets, measure_views, seed_dataset
+from .bulk import bulk_create_inherited, bulk_insert
+from .events import SUBSCRIBER_QUEUE_SIZE, EventBroker
+from .facets import animal_facets, invalidate_animal_facets
+from .forms import AnimalForm
+from .fragments import FRAGMENT_CACHE, VERSION_CACHE
+from .imports import decode_lines, import_animals
+from .instrumentation import FLUSH_INTERVAL, STALE_AFTER, ViewMetrics
+from .intake import ADOPTION_JOB, ADOPTION_STEPS, intake_animals
+from .jobs import HANDLERS, claim_batch, enqueue, run_batch
+from .media import IMAGE_DIR, VARIANT_WIDTHS, mark_rendered, picture, render_variants, store_image
+from .models import (
+    Address,
+    Adopter,
+    Animal,
+    AnimalComment,
+    Cat,
+    Dog,
+    Job,
+    Person,
+    Shelter,
+    Task,
+    TaskComment,
+    TaskItem,
+    Turtle,
+    Volunteer,
+    Worker,
+)
+from .pagination import encode_cursor, keyset_paginate
+from .sampling import PROBE_ROUNDS, random_animals
+from .views import ANIMAL_BROWSER_ORDERING
+
+
+def create_shelter(address, name="Furry Friends Animal Shelter", email="info@furryfriends.com"):
+    return Shelter.objects.create(
+        name=name, phone_number="800-123-456", email_address=email, address=address
+    )
+
+
+def create_dog(shelter, **fields):
+    """Creates a dog (and its automatic tasks) in shelter; fields override the defaults."""
+    return Dog.objects.create(
+        **{
+            "name": "Bubba",
+            "color": "black",
+            "sex": "M",
+            "description": "A very large, very friendly dog.",
+            "ready_to_adopt": True,
+            "shelter": shelter,
+            "is_fixed": False,
+            "image": "",
+            **fields,
+        }
+    )
+
+
+class ShelterTestCase(TestCase):
+    """
+    Base class for tests that need a shelter, created once per class. Subclasses add what else
+    they need in their own setUpTestData (calling super() first).
+
+    Attributes:
+    address: The address of the shelter and the worker.
+    shelter: The shelter.
+    worker: A manager working at the shelter.
+    dog: A dog in the shelter.
+    task: The first of the dog's automatic tasks.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.address = Address.objects.create(
+            street1="1447 N Shelter Dr.", city="Lawnside", state="NJ", postal="08447", country="US"
+        )
+        cls.shelter = create_shelter(cls.address)
+        cls.worker = Worker.objects.create(
+            name="Steven Beltran",
+            phone_number="555-123-4567",
+            email="steveb@email.com",
+            address=cls.address,
+            username="steveb235",
+            password="password",
+            role="MA",
+            hire_date=timezone.now(),
+            shelter=cls.shelter,
+        )
+        cls.dog = create_dog(cls.shelter)
+        cls.task = Task.objects.filter(animal=cls.dog).first()
+
+    def login(self):
+        self.client.get(
+            reverse("login"), {"email": self.worker.email, "password": self.worker.password}
+        )
+
+
+class IndexUsageTests(ShelterTestCase):
+    """
+    Runs the dashboard filter/sort views, the animal browser and the email lookups through the
+    test client and checks with EXPLAIN QUERY PLAN that none of their filtered or ordered queries
+    falls back to a full table scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Cat.objects.create(
+            name="Princess",
+            color="orange",
+            sex="F",
+            description="A beautiful but mean cat.",
+            ready_to_adopt=False,
+            shelter=cls.shelter,
+            is_fixed=True,
+            image="",
+        )
+
+    def setUp(self):
+        self.login()
+
+    def assertUsesIndexes(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            getattr(self.client, method)(url, data or {})
+
+        checked = 0
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT") or (" WHERE " not in sql and " ORDER BY " not in sql):
+                    continue
+                checked += 1
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    # "SCAN core_task" is a full table scan; "SCAN ... USING INDEX" is an index walk
+                    if detail.startswith("SCAN") and "USING" not in detail:
+                        self.fail(f"{url} scans a table ({detail}) in:\n{sql}")
+        self.assertGreater(checked, 0)
+
+    def test_filter_tasks(self):
+        url = reverse("filter_tasks")
+        self.assertUsesIndexes("post", url, {"completion_status": "incomplete"})
+        self.assertUsesIndexes("post", url, {"completion_status": "completed"})
+        self.assertUsesIndexes("post", url, {"assignee": self.worker.id})
+        self.assertUsesIndexes("post", url, {"animal": self.dog.id, "completion_status": "incomplete"})
+
+    def test_sort_tasks(self):
+        for sort in ["title", "due_date", "creation_datetime"]:
+            self.assertUsesIndexes("post", reverse("sort_tasks"), {"sort": sort})
+
+    def test_task_windows(self):
+        # The windows loaded as the list scrolls seek past a cursor instead of using OFFSET
+        url = reverse("filter_tasks")
+        after = encode_cursor(self.task, ("due_date", "id"))
+        self.assertUsesIndexes("get", url, {"after": after})
+        after = encode_cursor(self.task, ("title", "id"))
+        self.assertUsesIndexes("get", url, {"sort": "title", "after": after})
+        self.task.completion_datetime = timezone.now()
+        self.task.save()
+        after = encode_cursor(self.task, ("-completion_datetime", "-id"))
+        self.assertUsesIndexes("get", url, {"completion_status": "completed", "after": after})
+
+    def test_animals(self):
+        url = reverse("animals")
+        self.assertUsesIndexes("get", url, {"color": "black"})
+        self.assertUsesIndexes("get", url, {"sex": "F"})
+        self.assertUsesIndexes("get", url, {"location": self.shelter.name})
+
+    def test_email_lookups(self):
+        self.assertUsesIndexes(
+            "get", reverse("login"), {"email": self.worker.email, "password": self.worker.password}
+        )
+        self.assertUsesIndexes("get", reverse("swap_task", args=[self.task.id]))
+        self.assertUsesIndexes("post", reverse("add_task_comment", args=[self.task.id]), {"text": "Done"})
+
+
+class KeysetPaginationTests(ShelterTestCase):
+    """Pages through the animal browser's ordering in both directions, including ties."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        for n in range(6):
+            # Pairs of dogs share an intake date, so the id has to break the tie
+            create_dog(cls.shelter, name=f"Dog {n}", intake_date=now - timedelta(days=n // 2))
+
+    def setUp(self):
+        self.animals = Animal.objects.for_list()
+        self.expected = list(
+            self.animals.order_by(*ANIMAL_BROWSER_ORDERING).values_list("id", flat=True)
+        )
+
+    def paginate(self, **cursor):
+        return keyset_paginate(self.animals, ANIMAL_BROWSER_ORDERING, 3, **cursor)
+
+    def test_forward_and_back(self):
+        pages = [self.paginate()]
+        while pages[-1].has_next:
+            pages.append(self.paginate(after=pages[-1].next_cursor))
+        self.assertFalse(pages[0].has_previous)
+        self.assertEqual([a.pk for page in pages for a in page], self.expected)
+
+        back = [pages[-1]]
+        while back[-1].has_previous:
+            back.append(self.paginate(before=back[-1].previous_cursor))
+        self.assertEqual([a.pk for page in reversed(back) for a in page], self.expected)
+        self.assertTrue(back[-1].has_next)
+
+    def test_garbage_cursor(self):
+        wrong_length = encode_cursor(self.dog, ("id",))
+        for cursor in ["garbage", "!!!", wrong_length, encode_cursor(self.dog, ("name", "id"))]:
+            page = self.paginate(after=cursor)
+            self.assertEqual([a.pk for a in page], self.expected[:3])
+            self.assertFalse(page.has_previous)
+            page = self.paginate(before=cursor)
+            self.assertEqual([a.pk for a in page], self.expected[:3])
+
+        response = self.client.get(reverse("animals"), {"after": "garbage", "before": "!!!"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Next", response.content.decode())
+
+
+class FacetTests(ShelterTestCase):
+    """Checks the animal browser's facet counts and that they follow changes to the animals."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cat = Cat.objects.create(
+            name="Princess",
+            color="orange",
+            sex="F",
+            description="A beautiful but mean cat.",
+            ready_to_adopt=False,
+            shelter=cls.shelter,
+            is_fixed=True,
+            image="",
+        )
+        cls.other = create_shelter(cls.address, name="Empty Shelter", email="info@empty.com")
+
+    def setUp(self):
+        invalidate_animal_facets()
+
+    def test_counts(self):
+        self.assertEqual(
+            animal_facets(),
+            {
+                "location": [("Empty Shelter", 0), (self.shelter.name, 2)],
+                "color": [("black", 1), ("orange", 1)],
+                "sex": [("F", 1), ("M", 1)],
+            },
+        )
+        # Each facet is counted within the selection of the other facets only
+        facets = animal_facets({"color": ["black"], "location": [self.shelter.name]})
+        self.assertEqual(facets["color"], [("black", 1), ("orange", 1)])
+        self.assertEqual(facets["sex"], [("F", 0), ("M", 1)])
+        self.assertEqual(facets["location"], [("Empty Shelter", 0), (self.shelter.name, 1)])
+
+        with self.assertNumQueries(0):
+            animal_facets({"sex": ["F"]})
+        response = self.client.get(reverse("animals"), {"sex": "F"})
+        self.assertContains(response, 'id="facet-color-orange"')
+
+    def test_invalidation(self):
+        animal_facets()
+        create_dog(self.other, name="Rex", color="brown")
+        facets = animal_facets()
+        self.assertIn(("Empty Shelter", 1), facets["location"])
+        self.assertIn(("brown", 1), facets["color"])
+
+        self.other.name = "Lawnside Shelter"
+        self.other.save()
+        self.assertIn(("Lawnside Shelter", 1), animal_facets()["location"])
+
+        self.cat.delete()
+        facets = animal_facets()
+        self.assertNotIn("orange", dict(facets["color"]))
+        self.assertEqual(dict(facets["sex"]), {"M": 2})
+
+        dog = Dog(
+            name="Max",
+            color="white",
+            sex="M",
+            description="Transfer",
+            ready_to_adopt=False,
+            shelter=self.shelter,
+            is_fixed=False,
+        )
+        intake_animals([dog])
+        self.assertEqual(dict(animal_facets()["color"])["white"], 1)
+
+
+class ShelterScopeTests(ShelterTestCase):
+    """Checks that workers only see, search, export and import their own shelter's records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        other = create_shelter(cls.address, name="Other Shelter", email="info@other.com")
+        cls.other_dog = create_dog(
+            other,
+            name="Rex",
+            color="brown",
+            description="A very friendly dog from elsewhere.",
+        )
+        cls.other_task = Task.objects.filter(animal=cls.other_dog).first()
+
+    def setUp(self):
+        self.login()
+
+    def test_lists(self):
+        for url, data in [
+            (reverse("filter_tasks"), {"completion_status": "all"}),
+            (reverse("sort_animals"), {"sort": "name"}),
+            (reverse("worker_dash"), {}),
+        ]:
+            response = self.client.post(url, data) if data else self.client.get(url)
+            context = response.context
+            for obj in [*context.get("tasks", []), *context.get("animals", [])]:
+                self.assertEqual(obj.shelter_id, self.shelter.id)
+        calendar = self.client.get(reverse("get_calendar_tasks")).json()
+        self.assertEqual(len(calendar), Task.objects.filter(shelter=self.shelter).count())
+        # Impossible dates are ignored rather than failing the feed
+        response = self.client.get(reverse("get_calendar_tasks"), {"start": "2024-13-45"})
+        self.assertEqual(len(response.json()), len(calendar))
+
+    def test_details(self):
+        url = reverse("task_detail")
+        self.assertEqual(self.client.get(url, {"task_id": self.other_task.id}).status_code, 404)
+        url = reverse("animal_detail")
+        self.assertEqual(self.client.get(url, {"animal_id": self.other_dog.id}).status_code, 404)
+        self.assertEqual(self.client.get(url, {"animal_id": self.dog.id}).status_code, 200)
+
+    def test_actions(self):
+        # Every task and animal action answers 404 for another shelter's records
+        other_item = self.other_task.taskitem_set.first()
+        for method, url, data in [
+            ("get", reverse("swap_task", args=[self.other_task.id]), {}),
+            ("get", reverse("complete_task", args=[self.other_task.id]), {}),
+            ("get", reverse("release_task", args=[self.other_task.id]), {}),
+            ("get", reverse("edit_task", args=[self.other_task.id]), {}),
+            ("post", reverse("delete_task", args=[self.other_task.id]), {}),
+            ("post", reverse("complete_item", args=[other_item.id]), {}),
+            ("post", reverse("add_task_comment", args=[self.other_task.id]), {"text": "Mine"}),
+            ("post", reverse("add_animal_comment", args=[self.other_dog.id]), {"text": "Mine"}),
+            ("get", reverse("task_items"), {"task_id": self.other_task.id}),
+        ]:
+            with self.subTest(url=url):
+                response = getattr(self.client, method)(url, data)
+                self.assertEqual(response.status_code, 404)
+
+        task = Task.objects.get(pk=self.other_task.pk)
+        self.assertEqual(
+            (task.assignee_id, task.completion_datetime, task.is_released, task.items_complete),
+            (self.other_task.assignee_id, None, self.other_task.is_released, 0),
+        )
+        self.assertFalse(TaskItem.objects.get(pk=other_item.pk).is_complete)
+        self.assertFalse(TaskComment.objects.exists())
+        self.assertFalse(AnimalComment.objects.exists())
+
+    def test_search(self):
+        results = self.client.get(reverse("search_results"), {"q": "friendly"}).context["results"]
+        self.assertEqual([result["target"].pk for result in results], [self.dog.pk])
+        # Hits in other shelters are filtered out in the search query, so no page of them is
+        # offered either
+        response = self.client.get(reverse("search_results"), {"q": "elsewhere"})
+        self.assertEqual((response.context["results"], response.context["has_next"]), ([], False))
+
+    def test_export(self):
+        url = reverse("export_data", args=["animals"])
+        response = self.client.get(url, {"format": "jsonl", "shelter": self.other_dog.shelter_id})
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertIn('"name": "Bubba"', rows[0])
+        response = self.client.get(url, {"since": "2024-02-30"})
+        self.assertEqual(response.status_code, 400)
+        # The command names the date argparse rejected
+        with self.assertRaisesMessage(CommandError, "'2024-02-30' is not a date"):
+            call_command("export_data", "animals", "--since", "2024-02-30")
+
+    def test_import(self):
+        # The second row names the other shelter
+        upload = io.BytesIO(
+            (
+                "type,name,color,sex,age,image,description,ready_to_adopt,is_fixed,shelter\n"
+                "dog,Max,white,M,2,/static/images/dog1.jpg,Calm.,yes,yes,\n"
+                "dog,Spot,white,M,2,/static/images/dog2.jpg,Calm.,yes,yes,"
+                f"{self.other_dog.shelter_id}\n"
+            ).encode()
+        )
+        upload.name = "animals.csv"
+        result = self.client.post(reverse("import_animals"), {"file": upload}).context["result"]
+        self.assertEqual((result.created, [error.line for error in result.errors]), (1, [3]))
+        self.assertEqual(Dog.objects.get(name="Max").shelter_id, self.shelter.id)
+
+
+class AddressTests(TestCase):
+    """Checks that model forms reject an address that only differs from another in formatting."""
+
+    def test_duplicate_in_form(self):
+        fields = {
+            "street1": "1447 N Shelter Dr.",
+            "street2": "Suite 2",
+            "city": "Lawnside",
+            "state": "NJ",
+            "postal": "08447",
+            "country": "US",
+        }
+        address = Address.objects.create(**fields)
+        AddressForm = modelform_factory(Address, fields=Address.FIELDS)
+        form = AddressForm({**fields, "street1": "1447 n shelter dr"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("already exists", str(form.non_field_errors()))
+        # Saving an address unchanged doesn't count as a duplicate of itself
+        self.assertTrue(AddressForm(fields, instance=address).is_valid())
+
+
+class ImportTests(ShelterTestCase):
+    """Checks that a CSV import reports the lines it can't read instead of failing."""
+
+    def test_unreadable_lines(self):
+        header = b"type,name,color,sex,age,image,description,ready_to_adopt,is_fixed\n"
+        row = b"dog,Max,white,M,2,/static/images/dog1.jpg,Calm.,yes,yes\n"
+        for bad_line, message in [
+            (b"dog,Caf\xe9,white\n", "not UTF-8"),
+            (b'dog,"' + b"x" * (csv.field_size_limit() + 1) + b'"\n', "Malformed CSV"),
+        ]:
+            lines = decode_lines(io.BytesIO(header + row + bad_line + row))
+            result = import_animals(lines, only_shelter=self.shelter.pk)
+            # The rows before the unreadable line are imported
+            self.assertEqual(result.created, 1)
+            self.assertEqual([error.line for error in result.errors], [3])
+            self.assertIn(message, result.errors[0].message)
+
+
+class AnonymousAccessTests(ShelterTestCase):
+    """Checks that the views acting as the logged-in worker turn away anonymous requests."""
+
+    def test_worker_actions(self):
+        task = self.task
+        task.is_released = True
+        task.save()
+
+        self.assertEqual(self.client.get(reverse("swap_task", args=[task.id])).status_code, 403)
+        task.refresh_from_db()
+        self.assertTrue(task.is_released)
+        for url in [
+            reverse("add_task_comment", args=[task.id]),
+            reverse("add_animal_comment", args=[self.dog.id]),
+        ]:
+            self.assertEqual(self.client.post(url, {"text": "Done"}).status_code, 403)
+        self.assertFalse(TaskComment.objects.exists())
+
+
+class JobQueueTests(ShelterTestCase):
+    """
+    Enqueues adoption and volunteer submissions through their views, runs the queue the way
+    `manage.py run_jobs` does, and checks the outcome and the retry handling.
+    """
+
+    def setUp(self):
+        self.form = {
+            "name": "Dana Reyes",
+            "phone_number": "555-987-6543",
+            "email": "dana@email.com",
+            "address_one": "1700 Rowan Blvd.",
+            "city": "Glassboro",
+            "state": "NJ",
+            "postal": "08028",
+            "country": "US",
+        }
+
+    def run_queue(self):
+        jobs = claim_batch(100)
+        run_batch(jobs)
+        return jobs
+
+    def test_intake(self):
+        self.client.post(reverse("adoption", args=[self.dog.id]), self.form)
+        self.client.post(reverse("adoption", args=[self.dog.id]), self.form)
+        # Another person at the same address, written differently
+        self.client.post(
+            reverse("volunteer_form"),
+            {
+                **self.form,
+                "email": "sam@email.com",
+                "address_one": "1700  rowan blvd",
+                "shelter": self.shelter.id,
+            },
+        )
+        missing = enqueue(ADOPTION_JOB, {**self.form, "pet_id": self.dog.id + 1000})
+
+        self.assertEqual(len(self.run_queue()), 4)
+        # Everything was claimed, so a second run does nothing
+        self.assertEqual(self.run_queue(), [])
+
+        self.assertEqual(Adopter.objects.filter(email="dana@email.com").count(), 1)
+        self.assertEqual(Volunteer.objects.filter(email="sam@email.com").count(), 1)
+        self.assertEqual(Address.objects.filter(city="Glassboro").count(), 1)
+        adoptions = Task.objects.filter(title="Adoption", animal=self.dog)
+        self.assertEqual(adoptions.count(), 2)
+        self.assertEqual(Task.objects.filter(title="Volunteer").count(), 1)
+        self.assertEqual(
+            TaskItem.objects.filter(task__in=adoptions).count(), 2 * len(ADOPTION_STEPS)
+        )
+
+        # A job for an animal that doesn't exist fails without retrying
+        missing.refresh_from_db()
+        self.assertEqual((missing.status, missing.attempts), (Job.FAILED, 1))
+        self.assertEqual(Job.objects.exclude(pk=missing.pk).exclude(status=Job.DONE).count(), 0)
+
+    def test_retries(self):
+        def broken(jobs):
+            raise RuntimeError("Mail server down")
+
+        with mock.patch.dict(HANDLERS, {"test.broken": broken}):
+            job = Job.objects.create(kind="test.broken", payload={}, max_attempts=2)
+            with self.assertLogs("core.jobs", "ERROR"):
+                self.run_queue()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+            self.assertGreater(job.run_after, timezone.now())
+            # Backed off, so it isn't claimed again right away
+            self.assertEqual(self.run_queue(), [])
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            with self.assertLogs("core.jobs", "ERROR"):
+                self.run_queue()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+            self.assertIn("Mail server down", job.last_error)
+
+
+class IntakeTests(ShelterTestCase):
+    """Checks that the batch intake saves everything with a fixed number of queries."""
+
+    def make_animals(self, count):
+        fields = {
+            "color": "brown",
+            "sex": "F",
+            "description": "Transfer",
+            "ready_to_adopt": False,
+            "shelter": self.shelter,
+        }
+        kinds = [
+            lambda n: Dog(name=f"Dog {n}", is_fixed=True, breed="Mutt", **fields),
+            lambda n: Cat(name=f"Cat {n}", is_fixed=False, breed="Tabby", **fields),
+            lambda n: Turtle(name=f"Turtle {n}", species="Box turtle", **fields),
+        ]
+        return [kinds[n % 3](n) for n in range(count)]
+
+    def test_intake_animals(self):
+        # The content types are looked up once and then cached for the life of the process
+        ContentType.objects.get_for_models(Dog, Cat, Turtle)
+        counts = []
+        # Both batches fit in one INSERT per table; bigger ones add a chunk per parameter limit
+        for count in [3, 12]:
+            animals = self.make_animals(count)
+            with CaptureQueriesContext(connection) as queries:
+                intake_animals(animals)
+            counts.append(len(queries))
+
+            tasks = Task.objects.filter(animal__in=animals)
+            expected = sum(len(animal.AUTOMATIC_TASKS) for animal in animals)
+            self.assertEqual(tasks.count(), expected)
+            self.assertEqual(TaskItem.objects.filter(task__in=tasks).count(), expected)
+            saved = Animal.objects.filter(pk__in=[animal.pk for animal in animals])
+            self.assertEqual(
+                sorted(type(animal).__name__ for animal in saved),
+                sorted(type(animal).__name__ for animal in animals),
+            )
+        self.assertEqual(counts[0], counts[1])
+
+
+class BulkInsertTests(ShelterTestCase):
+    """Checks that the bulk inserts in core/bulk.py store the same values save() does."""
+
+    def assertSameRows(self, model, saved, inserted, exclude=()):
+        fields = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in exclude
+        ]
+        rows = model.objects.filter(pk__in=[saved.pk, inserted.pk]).values(*fields)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0], rows[1])
+
+    def test_bulk_insert(self):
+        fields = {
+            "title": "Vet visit",
+            "description": "Annual checkup, with “smart quotes”.",
+            "shelter": self.shelter,
+            "due_date": timezone.now() + timedelta(days=3),
+            "completion_datetime": timezone.now(),
+            "required_role": Task.VET,
+            "is_released": True,
+            "items_total": 1,
+        }
+        saved = Task.objects.create(assignee=self.worker, animal=self.dog, **fields)
+        inserted = Task(assignee=self.worker, animal=self.dog, **fields)
+        # The task is assigned before it has a key, which the insert copies like save() does
+        item = TaskItem(item_number=1, text="Weigh", is_complete=False, task=inserted)
+        bulk_insert([inserted])
+        bulk_insert([item])
+        self.assertSameRows(
+            Task, saved, inserted, exclude=["creation_datetime", "modified_datetime"]
+        )
+        self.assertIsNotNone(inserted.creation_datetime)
+        self.assertEqual(TaskItem.objects.get(pk=item.pk).task_id, inserted.pk)
+
+        with self.assertRaisesMessage(ValueError, "TaskItem.task is set to an unsaved Task."):
+            bulk_insert([TaskItem(item_number=1, text="Weigh", is_complete=False, task=Task())])
+        with self.assertRaisesMessage(ValueError, "Job.payload (JSONField) can't be bulk"):
+            bulk_insert([Job(kind="test", payload={"pet_id": 1})])
+
+    def test_bulk_create_inherited(self):
+        fields = {
+            "name": "Rita Moreno",
+            "phone_number": "555-987-6543",
+            "address": self.address,
+            "password": "password",
+            "role": Worker.VET,
+            "hire_date": timezone.now() - timedelta(days=30),
+            "shelter": self.shelter,
+        }
+        saved = Worker.objects.create(email="rita@email.com", username="rita", **fields)
+        inserted = Worker(email="rmoreno@email.com", username="rmoreno", **fields)
+        bulk_create_inherited([inserted])
+        self.assertSameRows(Worker, saved, inserted, exclude=["email", "username"])
+        self.assertIsInstance(Person.objects.get(pk=inserted.pk), Worker)
+
+
+class TaskItemTests(ShelterTestCase):
+    """Checks the numbering and counters of the items added to a task."""
+
+    def test_add_items_to_stale_task(self):
+        task = self.task
+        stale = Task.objects.get(pk=task.pk)
+        task.add_items(["Fill the water bowl"])
+        stale.add_items(["Brush", "Walk"])
+
+        numbers = list(
+            task.taskitem_set.order_by("item_number").values_list("item_number", flat=True)
+        )
+        self.assertEqual(numbers, list(range(1, len(numbers) + 1)))
+        self.assertEqual(stale.items_total, len(numbers))
+        task.refresh_from_db()
+        self.assertEqual(task.items_total, len(numbers))
+
+
+class SamplingTests(ShelterTestCase):
+    """Checks the random animals shown on the home page, with gaps in the ids."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        dogs = [create_dog(cls.shelter, name=f"Dog {n}", ready_to_adopt=n % 2) for n in range(6)]
+        dogs[0].delete()
+        dogs[3].delete()
+
+    def test_random_animals(self):
+        ids = set(Animal.objects.values_list("id", flat=True))
+        ready = set(Animal.objects.filter(ready_to_adopt=True).values_list("id", flat=True))
+        for _ in range(20):
+            with CaptureQueriesContext(connection) as queries:
+                sample = [animal.pk for animal in random_animals(3)]
+            self.assertLessEqual(len(queries), 1 + PROBE_ROUNDS + 2)
+            self.assertEqual(len(set(sample)), 3)
+            self.assertLessEqual(set(sample), ids)
+
+            sample = {animal.pk for animal in random_animals(3, ready_to_adopt=True)}
+            self.assertEqual(sample, ready)
+
+        self.assertEqual({animal.pk for animal in random_animals(10)}, ids)
+
+
+class FragmentCacheTests(ShelterTestCase):
+    """
+    Checks that the cached dashboard cards and modals are re-rendered after the task they show,
+    or something shown with it, changes.
+    """
+
+    def setUp(self):
+        caches[FRAGMENT_CACHE].clear()
+        caches[VERSION_CACHE].clear()
+        self.login()
+
+    def render_card(self):
+        return self.client.get(reverse("task_card", args=[self.task.id])).content.decode()
+
+    def render_modal(self):
+        return self.client.get(reverse("task_detail"), {"task_id": self.task.id}).content.decode()
+
+    def test_invalidation(self):
+        self.assertIn(self.task.title, self.render_card())
+        self.render_modal()
+
+        # Versions are bumped once the change commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = "Walk Bubba"
+            self.task.save()
+        self.assertIn("Walk Bubba", self.render_card())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskComment.objects.create(task=self.task, person=self.worker, text="Done at noon")
+        self.assertIn("Done at noon", self.render_modal())
+
+        # mark_complete() updates the counters without sending signals
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskItem.mark_complete(self.task.taskitem_set.get().id)
+        self.assertIn("1 out of 1 complete", self.render_card())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shelter.name = "Lawnside Shelter"
+            self.shelter.save()
+        self.assertIn("Lawnside Shelter", self.render_modal())
+
+    def test_card_update_without_event_stream(self):
+        # The modal actions send the changed card along, since WSGI clients get no events
+        url = reverse("complete_item", args=[self.task.taskitem_set.get().id])
+        response = self.client.post(url, HTTP_HX_REQUEST="true")
+        content = response.content.decode()
+        self.assertIn(f'id="task-card-{self.task.id}" hx-swap-oob="true"', content)
+        self.assertEqual(content.count("1 out of 1 complete"), 2)
+
+        response = self.client.get(reverse("task_detail"), {"task_id": self.task.id})
+        self.assertNotIn("hx-swap-oob", response.content.decode())
+
+
+class MediaTests(ShelterTestCase):
+    """Stores an image, renders its variants and points an animal at them."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_store_and_render(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 900), "orange").save(buffer, "PNG")
+        stored = store_image(buffer.getvalue())
+        # The same content is stored once, under the same URL
+        self.assertEqual(store_image(buffer.getvalue()), stored)
+
+        render_variants(stored)
+        for width in VARIANT_WIDTHS:
+            variant = picture(stored.digest, width)
+            for url in (variant.jpeg, variant.webp):
+                name = url.removeprefix("/media/")
+                with default_storage.open(name) as f, Image.open(f) as image:
+                    self.assertEqual(image.size, (width, width * 3 // 4))
+
+        cat = Cat.objects.create(
+            name="Princess",
+            color="orange",
+            sex="F",
+            description="A beautiful but mean cat.",
+            ready_to_adopt=False,
+            shelter=self.shelter,
+            is_fixed=True,
+            image="/static/images/cat.jpg",
+        )
+        self.assertEqual(mark_rendered(stored, "/static/images/cat.jpg"), 1)
+        cat.refresh_from_db()
+        self.assertEqual((cat.image, cat.image_hash), (stored.url, stored.digest))
+
+    def test_upload_stored_on_save(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), "brown").save(buffer, "PNG")
+        data = {
+            "name": "",
+            "color": "brown",
+            "intake_date": "2025-01-01 00:00",
+            "age": 3,
+            "description": "Friendly.",
+            "shelter": self.shelter.pk,
+        }
+
+        def form(**fields):
+            upload = SimpleUploadedFile("dog.png", buffer.getvalue(), content_type="image/png")
+            return AnimalForm({**data, **fields}, {"upload": upload}, instance=self.dog)
+
+        # A form that fails validation stores nothing
+        self.assertFalse(form().is_valid())
+        self.assertFalse(default_storage.exists(IMAGE_DIR))
+
+        valid = form(name="Rex")
+        self.assertTrue(valid.is_valid())
+        self.assertFalse(default_storage.exists(IMAGE_DIR))
+        animal = valid.save()
+        self.assertTrue(default_storage.exists(animal.image.removeprefix("/media/")))
+
+
+class EventTests(ShelterTestCase):
+    """Checks the dashboard event broker and the event stream that forwards its events."""
+
+    def test_publish_and_subscribe(self):
+        broker = EventBroker()
+
+        async def listen():
+            first, second = broker.subscribe(), broker.subscribe()
+            # Published from a view thread, delivered on the subscribers' loop
+            thread = threading.Thread(target=broker.publish, args=["task-1"])
+            thread.start()
+            thread.join()
+            self.assertEqual(await asyncio.wait_for(first.get(), 1), "task-1")
+            self.assertEqual(await asyncio.wait_for(second.get(), 1), "task-1")
+
+            broker.unsubscribe(first)
+            for n in range(SUBSCRIBER_QUEUE_SIZE + 1):
+                broker.publish(f"animal-{n}")
+            await asyncio.sleep(0)
+            self.assertTrue(first.empty())
+            # A full queue drops the newest events instead of blocking the publisher
+            self.assertEqual(second.qsize(), SUBSCRIBER_QUEUE_SIZE)
+            self.assertEqual(second.get_nowait(), "animal-0")
+
+        asyncio.run(listen())
+        self.assertEqual(len(broker.subscribers), 1)
+        # The loop of the remaining subscriber is closed, which publish() ignores
+        broker.publish("task-2")
+
+    def test_publish_on_commit(self):
+        with mock.patch.object(events.broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.task.title = "Walk Bubba"
+                self.task.save()
+                publish.assert_not_called()
+            publish.assert_called_once_with(f"task-{self.task.id}")
+
+            publish.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.dog.save()
+            self.assertIn(mock.call(f"animal-{self.dog.id}"), publish.call_args_list)
+
+    async def test_stream(self):
+        await sync_to_async(self.login)()
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get(reverse("dashboard_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+        self.assertEqual(len(events.broker.subscribers), 1)
+
+        events.broker.publish(f"task-{self.task.id}")
+        chunk = await asyncio.wait_for(anext(chunks), 1)
+        self.assertEqual(chunk, f"event: task-{self.task.id}\ndata: \n\n".encode())
+        await chunks.aclose()
+
+    def test_stream_needs_asgi(self):
+        self.login()
+        self.assertEqual(self.client.get(reverse("dashboard_events")).status_code, 204)
+
+
+class ViewMetricsTests(ShelterTestCase):
+    """Checks the Server-Timing header and what the view_metrics command reports from it."""
+
+    def setUp(self):
+        # A fresh aggregate that writes to disk on the first request
+        self.metrics = ViewMetrics()
+        self.metrics.last_flush = -FLUSH_INTERVAL
+        patcher = mock.patch("core.middleware.view_metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_server_timing(self):
+        with self.settings(VIEW_METRICS_DIR=self.directory.name):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("animals"))
+        match = re.fullmatch(
+            r'sql;dur=[\d.]+;desc="(\d+) queries, \d+ duplicates", '
+            r"tpl;dur=[\d.]+, total;dur=[\d.]+",
+            response["Server-Timing"],
+        )
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertEqual(int(match[1]), len(queries))
+
+        out = io.StringIO()
+        with self.settings(VIEW_METRICS_DIR=self.directory.name):
+            call_command("view_metrics", "--json", stdout=out)
+        summary = json.loads(out.getvalue())
+        self.assertEqual(list(summary), ["animals"])
+        self.assertEqual(summary["animals"]["requests"], 1)
+        self.assertEqual(summary["animals"]["queries_p95"], len(queries))
+        self.assertEqual(summary["animals"]["bytes_p50"], len(response.content))
+
+        out = io.StringIO()
+        with self.settings(VIEW_METRICS_DIR=self.directory.name):
+            call_command("view_metrics", "--reset", stdout=out)
+            self.assertRegex(out.getvalue(), r"\nanimals +1 ")
+            out = io.StringIO()
+            call_command("view_metrics", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "No samples recorded yet.")
+
+    def test_stale_files_pruned(self):
+        # The files of two processes that have exited, one of them long ago
+        sample = [[5.0, 1, 1.0, 0, 2.0, 100]]
+        paths = [os.path.join(self.directory.name, f"view_metrics-{pid}.json") for pid in (1, 2)]
+        for path in paths:
+            with open(path, "w") as f:
+                json.dump({"animals": sample}, f)
+        old = time.time() - STALE_AFTER - 60
+        os.utime(paths[0], (old, old))
+
+        out = io.StringIO()
+        with self.settings(VIEW_METRICS_DIR=self.directory.name):
+            call_command("view_metrics", "--json", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["animals"]["requests"], 1)
+        self.assertEqual([os.path.exists(path) for path in paths], [False, True])
+
+
+class ViewBudgetTests(TestCase):
+    """
+    Seeds a small generated dataset, drives the hot views through the test client and checks
+    their query counts against core/benchmark_budgets.json, so a view that starts issuing a query
+    per row fails here. Latency budgets are only enforced by the benchmark_views command, since
+    timings in a shared test run are too noisy.
+    """
+
+    def test_query_budgets(self):
+        seed_dataset(50)
+        results = measure_views(iterations=2)
+        budgets = load_budgets()
+        self.assertEqual(
+            check_budgets(50, results, {"queries": budgets["queries"], "latency_ms_p95": {}}), []
+        )
+        self.assertEqual(set(results), set(budgets["queries"]))
@@ -1,19 +1,15 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, condition
 from django.urls import reverse
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from .models import (
     Animal,
     Task,
     Worker,
     Shelter,
-    Person,
-    Address,
-    Adopter,
     AnimalComment,
     TaskComment,
-    Volunteer,
     TaskItem,
 )
 from .forms import (
@@ -26,15 +22,104 @@ from .forms import (
     WorkerForm
 )
 from .serializers import TaskSerializer
-
-from django.core.paginator import Paginator
+from .pagination import keyset_paginate, cached_count
+from .facets import animal_facets
+from .sampling import random_animals
+from .events import broker, KEEPALIVE_INTERVAL
+from .search import search
+from .exports import EXPORTS, FORMATS, export_response
+from .imports import decode_lines, import_animals
+from .middleware import remember_worker
+from .jobs import enqueue
+from .intake import ADOPTION_JOB, VOLUNTEER_JOB
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.views.static import serve
+from django.utils.http import urlencode
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
 from datetime import datetime
+from asgiref.sync import sync_to_async
+import asyncio
+import hashlib
 
 # Create your views here.
 
 
+def _parse_calendar_bound(value):
+    """
+    FullCalendar sends its visible range as ISO 8601 strings, either full datetimes with an
+    offset or plain dates depending on the view. Returns an aware datetime, or None if value is
+    empty or isn't a valid date (well-formed but impossible ones like 2024-02-30 included).
+    """
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value.replace(" ", "+"))
+        if parsed is None:
+            date = parse_date(value)
+            if date is None:
+                return None
+            parsed = datetime.combine(date, datetime.min.time())
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _calendar_tasks(request):
+    """
+    Builds the task queryset for the calendar feed from the request's query parameters:
+    'start'/'end' limit the window on the due_date column, and 'assignee' optionally narrows it
+    to one worker. Only the logged-in worker's shelter is included (task_shelter_due_idx); the
+    'shelter' parameter can't reach past that.
+    """
+    tasks = Task.objects.for_request(request)
+
+    start = _parse_calendar_bound(request.GET.get("start"))
+    end = _parse_calendar_bound(request.GET.get("end"))
+    if start:
+        tasks = tasks.filter(due_date__gte=start)
+    if end:
+        tasks = tasks.filter(due_date__lt=end)
+
+    shelter = request.GET.get("shelter")
+    if shelter and shelter.isdigit():
+        tasks = tasks.filter(shelter_id=shelter)
+    assignee = request.GET.get("assignee")
+    if assignee and assignee.isdigit():
+        tasks = tasks.filter(assignee_id=assignee)
+
+    return tasks
+
+
+def _calendar_stamp(request):
+    """
+    Returns (etag, last_modified) for the requested calendar window. Both come from a single
+    aggregate over the window, and the result is kept on the request since the conditional
+    GET decorator asks for each value separately. The task count is part of the ETag so that
+    deleting a task also changes it.
+    """
+    if not hasattr(request, "_calendar_stamp"):
+        stamp = _calendar_tasks(request).aggregate(
+            newest=Max("modified_datetime"), total=Count("id")
+        )
+        shelter = request.current_worker.shelter_id
+        key = f"{shelter}|{request.GET.urlencode()}|{stamp['total']}|{stamp['newest']}"
+        etag = hashlib.md5(key.encode()).hexdigest()
+        request._calendar_stamp = (etag, stamp["newest"])
+    return request._calendar_stamp
+
+
+@condition(
+    etag_func=lambda request: _calendar_stamp(request)[0],
+    last_modified_func=lambda request: _calendar_stamp(request)[1],
+)
 def get_tasks_for_calendar(request):
-    tasks = Task.objects.all()
+    tasks = _calendar_tasks(request).only("title", "due_date")
     serializer = TaskSerializer(tasks, many=True)
     return JsonResponse(serializer.data, safe=False)
 
@@ -44,33 +129,27 @@ def task_calendar(request):
 
 
 def animal_list(request):
-
-    sexOptions = list(
-        Animal.objects.order_by().values_list("sex", flat=True).distinct()
-    )
-    colorOptions = list(
-        Animal.objects.order_by().values_list("color", flat=True).distinct()
-    )
-    locationOptions = list(
-        Shelter.objects.order_by().values_list("name", flat=True).distinct()
-    )
+    facets = animal_facets()
 
     return render(
         request,
         "animal_list.html",
         {
-            "sexOptions": sexOptions,
-            "colorOptions": colorOptions,
-            "locationOptions": locationOptions,
+            "sexOptions": facets["sex"],
+            "colorOptions": facets["color"],
+            "locationOptions": facets["location"],
         },
     )
 
 
+# Newest intakes first; "id" breaks ties so the cursor is unique
+ANIMAL_BROWSER_ORDERING = ("-intake_date", "-id")
+
+
 def animals(request):
 
     if request.method == "GET":
         params = dict(request.GET)
-        print(request.GET)
         query = {}
         for param in params:
             if param == "location":
@@ -80,13 +159,21 @@ def animals(request):
             if param == "sex":
                 query.update({"sex__in": params.get(param)})
 
-        p = Paginator(Animal.objects.filter(**query), 5)
-        page = request.GET.get("page")
-        animal = p.get_page(page)
-
-        # animal = Animal.objects.filter(**query)
+        animals = Animal.objects.for_list().filter(**query)
+        page = keyset_paginate(
+            animals,
+            ANIMAL_BROWSER_ORDERING,
+            5,
+            after=request.GET.get("after"),
+            before=request.GET.get("before"),
+        )
+        total = cached_count(animals, {key: sorted(value) for key, value in query.items()})
 
-        return render(request, "partials/animals.html", {"animals": animal})
+        return render(
+            request,
+            "partials/animals.html",
+            {"animals": page, "total": total, "facets": animal_facets(params)},
+        )
 
 
 def animal(request, pet_id):
@@ -105,24 +192,27 @@ def worker_dash(request):
     if request.session.get("is_valid") == False:
         return redirect(login)
 
-    tasks = Task.objects.all().prefetch_related("taskcomment_set")
-    animals = Animal.objects.all().prefetch_related("animalcomment_set")
-    workers = Worker.objects.all()
+    tasks, next_query = _task_window(request, {})
+    animals = Animal.objects.for_request(request).for_list()
+    workers = Worker.objects.for_request(request).for_list().select_related("shelter")
 
     return render(
         request,
         "worker_dashboard.html",
         {
             "tasks": tasks,
+            "next_query": next_query,
             "animals": animals,
             "workers": workers,
+            # The event stream needs an ASGI server (see dashboard_events)
+            "live_updates": isinstance(request, ASGIRequest),
         },
     )
 
 
 def add_animal(request):
     if request.method == "POST":
-        form = AnimalForm(request.POST)
+        form = AnimalForm(request.POST, request.FILES)
         if form.is_valid():
             form.save()
             return redirect(reverse("worker_dash"))
@@ -132,10 +222,32 @@ def add_animal(request):
     return render(request, "add_animal.html", {"form": form})
 
 
+def import_animals_csv(request):
+    """
+    Uploads a CSV of transferred animals (see core/imports.py for the columns) and imports it
+    in batches, then shows how many animals were created and which rows were skipped and why.
+    The animals all go to the logged-in worker's shelter.
+    """
+    shelter = request.current_worker.shelter_id
+    if not request.session.get("is_valid") or shelter is None:
+        return redirect(login)
+
+    result = None
+    if request.method == "POST" and "file" in request.FILES:
+        # Large uploads are spooled to disk by Django and read from there one row at a time
+        result = import_animals(decode_lines(request.FILES["file"]), only_shelter=shelter)
+
+    return render(
+        request,
+        "import_animals.html",
+        {"shelter": Shelter.objects.get(pk=shelter), "result": result},
+    )
+
+
 def edit_animal(request, animal_id):
-    animal = get_object_or_404(Animal, id=animal_id)
+    animal = get_object_or_404(Animal.objects.for_request(request), id=animal_id)
     if request.method == "POST":
-        form = AnimalForm(request.POST, instance=animal)
+        form = AnimalForm(request.POST, request.FILES, instance=animal)
         if form.is_valid():
             form.save()
             return redirect("worker_dash")
@@ -147,14 +259,14 @@ def edit_animal(request, animal_id):
 
 @require_POST
 def delete_animal(request, animal_id):
-    animal = get_object_or_404(Animal, id=animal_id)
+    animal = get_object_or_404(Animal.objects.for_request(request), id=animal_id)
     animal.delete()
     return redirect("worker_dash")
 
 
 def sort_animals(request):
     sort_by = request.POST.get("sort", "name")  # Default sort by name
-    animals = Animal.objects.all().order_by(sort_by)
+    animals = Animal.objects.for_request(request).for_list().order_by(sort_by)
     return render(request, "dash_animal_list.html", {"animals": animals})
 
 
@@ -175,7 +287,7 @@ def filter_animals(request):
     sex = request.POST.get("sex")
     ready_to_adopt = request.POST.get("ready_to_adopt")
 
-    animals = Animal.objects.all()
+    animals = Animal.objects.for_request(request).for_list()
 
     if sex:
         animals = animals.filter(sex=sex)
@@ -187,7 +299,7 @@ def filter_animals(request):
 
 def home(request):
 
-    animals = Animal.objects.order_by("?")[:3]
+    animals = random_animals(3)
 
     return render(request, "home.html", {"animals": animals})
 
@@ -196,88 +308,10 @@ def adoption(request, pet_id):
     if request.method == "POST":
         form = AdoptionForm(request.POST)
         if form.is_valid():
-            print("valid")
-            full_name = form.cleaned_data["name"]
-            phone_number = form.cleaned_data["phone_number"]
-            email = form.cleaned_data["email"]
-            address_one = form.cleaned_data["address_one"]
-            address_two = form.cleaned_data["address_two"]
-            city = form.cleaned_data["city"]
-            state = form.cleaned_data["state"]
-            postal = form.cleaned_data["postal"]
-            country = form.cleaned_data["country"]
-
-            # check if address is already in database. if not, insert into database.
-            if not Address.objects.filter(
-                street1=address_one,
-                street2=address_two,
-                city=city,
-                state=state,
-                postal=postal,
-                country=country,
-            ).exists():
-
-                address = Address.objects.create(
-                    street1=address_one,
-                    street2=address_two,
-                    city=city,
-                    state=state,
-                    postal=postal,
-                    country=country,
-                )
-                address.save()
-                print("Address added to database")
-
-            # check if person is already in database. if not, insert into database
-            if not Person.objects.filter(email=email).exists():
-
-                address = Address.objects.get(
-                    street1=address_one,
-                    street2=address_two,
-                    city=city,
-                    state=state,
-                    postal=postal,
-                    country=country,
-                )
-
-                print(address)
-
-                adopter = Adopter.objects.create(
-                    name=full_name,
-                    phone_number=phone_number,
-                    email=email,
-                    address=address,
-                    can_adopt=False,
-                )
-                adopter.save()
-                print("Person added to database.")
-
-            animal = Animal.objects.get(id=pet_id)
-
-            shelter = animal.shelter
-
-            task = Task(
-                title="Adoption",
-                description=f"{full_name} is interested in adopting. Please contact them.",
-                required_role="MA",
-                shelter=shelter,
-                animal=animal,
-            )
-            task.save()
-
-            task_item = TaskItem(
-                item_number=1, text="Contact client", is_complete=False, task=task
-            )
-            task_item.save()
-            task_item = TaskItem(
-                item_number=2, text="Fill out paperwork", is_complete=False, task=task
-            )
-            task_item.save()
-            task_item = TaskItem(
-                item_number=3, text="Interview client", is_complete=False, task=task
-            )
-            task_item.save()
-            print("Saved task")
+            if not Animal.objects.filter(id=pet_id).exists():
+                raise Http404("No Animal matches the given query.")
+            # The adopter and the adoption task are created by the job worker (manage.py run_jobs)
+            enqueue(ADOPTION_JOB, {**form.cleaned_data, "pet_id": pet_id})
 
     return redirect(animal_list)
 
@@ -302,12 +336,7 @@ def login(request):
         worker = Worker.objects.filter(email=email, password=password).first()
 
         if worker:
-            request.session["is_valid"] = True
-            request.session["worker"] = worker.email
-            if worker.role == "MA":
-                request.session["is_manager"] = True
-            else:
-                request.session["is_manager"] = False
+            remember_worker(request.session, worker)
             return redirect(worker_dash)
         else:
             return render(
@@ -323,60 +352,101 @@ def logout(request):
     return redirect(home)
 
 
-def filter_tasks(request):
-    """
-    A POST request to this view should contain a 'filter' parameter with a value of 'completed',
-    'incomplete', or 'all'. This view will return a list of tasks based on the filter value.
-    Additional filtering logic can be added as needed. See worker_dashboard.html for an idea of
-    how to structure the form that will send the POST request.
-    """
-    if request.method != "POST":
-        pass
+# Tasks rendered per window of the dashboard task list; scrolling to the end loads the next one
+TASK_WINDOW_SIZE = 25
 
-    completion_status = request.POST.get("completion_status", "").lower()
-    assignee = request.POST.get("assignee")
-    animal = request.POST.get("animal")
-    print(f"Comp: {completion_status}, Ass: {assignee}, An: {animal}")
+# Keyset orderings for the dashboard task list. Each ends with "id" so the cursor is unique.
+TASK_ORDERINGS = {
+    "due_date": ("due_date", "id"),
+    "title": ("title", "id"),
+    "creation_datetime": ("creation_datetime", "id"),
+    "completion_datetime": ("-completion_datetime", "-id"),
+}
 
-    filter_params = {}
 
+def _task_window(request, params):
+    """
+    Returns one window (a KeysetPage) of the dashboard task list and the query string that
+    fetches the window after it (None for the last window). params holds the list options, all
+    optional:
+    - completion_status: "incomplete" (the default, so the list tracks open work), "completed"
+      or "all"
+    - assignee / animal: ids to filter on
+    - sort: a TASK_ORDERINGS key; defaults to due date, or most recently completed first for
+      completed tasks
+    - after: the cursor of the previous window
+    Only the tasks of the worker's shelter are listed, and non-managers only see assigned tasks
+    (Task.objects.visible_to()).
+    """
+    completion_status = params.get("completion_status") or "incomplete"
+    tasks = (
+        Task.objects.for_request(request)
+        .visible_to(request.session.get("is_manager"))
+        .select_related("assignee")
+    )
     if completion_status == "completed":
-        filter_params["completion_datetime__isnull"] = False
-    elif completion_status == "incomplete":
-        filter_params["completion_datetime__isnull"] = True
-
-    if assignee:
-        filter_params["assignee"] = assignee
-
-    if animal:
-        filter_params["animal"] = animal
+        tasks = tasks.filter(completion_datetime__isnull=False)
+    elif completion_status != "all":
+        completion_status = "incomplete"
+        tasks = tasks.filter(completion_datetime__isnull=True)
+
+    assignee = params.get("assignee")
+    if assignee and assignee.isdigit():
+        tasks = tasks.filter(assignee=assignee)
+    animal = params.get("animal")
+    if animal and animal.isdigit():
+        tasks = tasks.filter(animal=animal)
+
+    sort = params.get("sort")
+    if sort not in TASK_ORDERINGS or (
+        sort == "completion_datetime" and completion_status != "completed"
+    ):
+        # Most recently completed first also lets SQLite walk task_completion_idx instead of
+        # scanning the table for the (non-selective) IS NOT NULL filter
+        sort = "completion_datetime" if completion_status == "completed" else "due_date"
+
+    page = keyset_paginate(
+        tasks, TASK_ORDERINGS[sort], TASK_WINDOW_SIZE, after=params.get("after")
+    )
+    next_query = None
+    if page.has_next:
+        next_query = urlencode(
+            {
+                "completion_status": completion_status,
+                "assignee": assignee or "",
+                "animal": animal or "",
+                "sort": sort,
+                "after": page.next_cursor,
+            }
+        )
+    return page, next_query
 
-    tasks = Task.objects.filter(**filter_params)
 
-    return render(request, "task_list.html", {"tasks": tasks})
+def filter_tasks(request):
+    """
+    A POST request to this view may contain a 'completion_status' ('incomplete', the default,
+    'completed' or 'all'), an 'assignee' and an 'animal' id, and a 'sort' (see
+    TASK_ORDERINGS). It returns the first window of the matching tasks; the window ends with a
+    placeholder that loads the next window (a GET to this view with an 'after' cursor) once it
+    is scrolled into view. See worker_dashboard.html for the forms that send the requests.
+    """
+    params = request.POST if request.method == "POST" else request.GET
+    tasks, next_query = _task_window(request, params)
+    template = "partials/task_window.html" if params.get("after") else "task_list.html"
+    return render(request, template, {"tasks": tasks, "next_query": next_query})
 
 
 def sort_tasks(request):
     """
     A POST request to this view should contain a 'sort' parameter with a value of 'title',
-    'due_date', or 'creation_datetime'. This view will return a list of tasks sorted by the
-    specified field. Again, see worker_dashboard.html for an idea of how to structure the form
-    that will send the POST request.
+    'due_date', or 'creation_datetime', and may contain the filter_tasks filters. This view
+    will return the first window of tasks sorted by the specified field.
     """
-    sort_value = request.POST.get("sort")
-
-    # default sort in case of unexpected sort values
-    sort_key = "title"
-    if sort_value in ["due_date", "creation_datetime"]:
-        sort_key = sort_value
-
-    tasks = Task.objects.all().order_by(sort_key)
-
-    return render(request, "task_list.html", {"tasks": tasks})
+    return filter_tasks(request)
 
 
 def edit_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.for_request(request), id=task_id)
     if request.method == "POST":
         form = TaskForm(request.POST, instance=task)
         if form.is_valid():
@@ -388,11 +458,13 @@ def edit_task(request, task_id):
 
 
 def complete_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.for_request(request), id=task_id)
 
     task.completion_datetime = datetime.now()
     task.save()
 
+    if _is_htmx(request):
+        return task_detail(request, task_id, update_card=True)
     return redirect("worker_dash")
 
 
@@ -405,11 +477,7 @@ def add_task(request):
             item_text_list = list(request.POST.getlist("item"))
             item_text_list.insert(0, form.cleaned_data["task_item"])
 
-            for i, item in enumerate(item_text_list):
-                task_item = TaskItem.objects.create(
-                    item_number=i + 1, text=item, is_complete=False, task=task
-                )
-                task_item.save()
+            task.add_items(item_text_list)
 
             return redirect("worker_dash")  # Redirect to the tasks list
     else:
@@ -418,41 +486,52 @@ def add_task(request):
 
 
 def release_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.for_request(request), id=task_id)
 
     task.is_released = True
     task.save()
 
+    if _is_htmx(request):
+        return task_card(request, task_id)
     return redirect("worker_dash")
 
 
 def swap_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    # Picking up a task assigns it to the logged-in worker
+    if request.current_worker.id is None:
+        return HttpResponse(status=403)
+    task = get_object_or_404(Task.objects.for_request(request), id=task_id)
 
-    worker = Worker.objects.get(email=request.session.get("worker"))
-    task.assignee = worker
+    task.assignee_id = request.current_worker.id
     task.is_released = False
     task.save()
 
+    if _is_htmx(request):
+        return task_card(request, task_id)
     return redirect("worker_dash")
 
 
 @require_POST
 def add_task_comment(request, task_id):
-    task = get_object_or_404(Task, pk=task_id)
-    worker = Worker.objects.filter(email=request.session["worker"]).first()
+    # Comments are signed by the logged-in worker
+    if request.current_worker.id is None:
+        return HttpResponse(status=403)
+    task = get_object_or_404(Task.objects.for_request(request), pk=task_id)
     text = request.POST.get("text")
-    comment = TaskComment(task=task, person=worker, text=text)
+    comment = TaskComment(task=task, person_id=request.current_worker.id, text=text)
     comment.save()
+    if _is_htmx(request):
+        return task_detail(request, task_id)
     return redirect(worker_dash)
 
 
 @require_POST
-def add_animal_comment(request, task_id):
-    animal = get_object_or_404(Animal, pk=task_id)
-    worker = Worker.objects.filter(email=request.session["worker"]).first()
+def add_animal_comment(request, pet_id):
+    if request.current_worker.id is None:
+        return HttpResponse(status=403)
+    animal = get_object_or_404(Animal.objects.for_request(request), pk=pet_id)
     text = request.POST.get("text")
-    comment = TaskComment(animal=animal, person=worker, text=text)
+    comment = AnimalComment(animal=animal, person_id=request.current_worker.id, text=text)
     comment.save()
     return redirect("worker_dash")
 
@@ -462,73 +541,9 @@ def volunteer_form(request):
     if request.method == "POST":
         form = AdoptionForm(request.POST)
         if form.is_valid():
-            name = form.cleaned_data["name"]
-            phone_number = form.cleaned_data["phone_number"]
-            email = form.cleaned_data["email"]
-            address_one = form.cleaned_data["address_one"]
-            address_two = form.cleaned_data.get("address_two", "")
-            city = form.cleaned_data["city"]
-            state = form.cleaned_data["state"]
-            postal = form.cleaned_data["postal"]
-            country = form.cleaned_data["country"]
-            shelter_id = request.POST.get("shelter")
-
-            # check if address is already in database. if not, insert into database.
-            if not Address.objects.filter(
-                street1=address_one,
-                street2=address_two,
-                city=city,
-                state=state,
-                postal=postal,
-                country=country,
-            ).exists():
-
-                address = Address.objects.create(
-                    street1=address_one,
-                    street2=address_two,
-                    city=city,
-                    state=state,
-                    postal=postal,
-                    country=country,
-                )
-                address.save()
-                print("Address added to database")
-
-            shelter = Shelter.objects.get(pk=shelter_id)
-
-            if not Person.objects.filter(email=email).exists():
-
-                address = Address.objects.get(
-                    street1=address_one,
-                    street2=address_two,
-                    city=city,
-                    state=state,
-                    postal=postal,
-                    country=country,
-                )
-
-                volunteer = Volunteer.objects.create(
-                    name=name,
-                    phone_number=phone_number,
-                    email=email,
-                    address=address,
-                    start_date=datetime.now(),
-                    shelter=shelter,
-                )
-                volunteer.save()
-
-            task = Task(
-                title="Volunteer",
-                description=f"{name} is interested in being a volunteer. Please contact them.",
-                required_role="MA",
-                shelter=shelter,
-            )
-            task.save()
-            task_item = TaskItem(
-                item_number=1, text="contact volunteer", is_complete=False, task=task
-            )
-            task_item.save()
-            print("Saved task")
+            shelter = get_object_or_404(Shelter, pk=request.POST.get("shelter"))
+            # The volunteer and their task are created by the job worker (manage.py run_jobs)
+            enqueue(VOLUNTEER_JOB, {**form.cleaned_data, "shelter_id": shelter.pk})
 
             return redirect("home")
     else:
@@ -539,25 +554,194 @@ def volunteer_form(request):
 
 @require_POST
 def delete_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.for_request(request), id=task_id)
     task.delete()
+    if _is_htmx(request):
+        # An empty fragment removes the card the request targeted
+        return HttpResponse("")
     return redirect("worker_dash")  # Redirect to the tasks list
 
 
 @require_POST
 def complete_item(request, item_id):
-    TaskItem.objects.filter(pk=item_id).update(is_complete=True)
+    items = TaskItem.objects.filter(task__in=Task.objects.for_request(request))
+    task_id = get_object_or_404(items.only("task_id"), pk=item_id).task_id
+    TaskItem.mark_complete(item_id)
+    if _is_htmx(request):
+        return task_detail(request, task_id, update_card=True)
     return redirect("worker_dash")
 
 
 def task_items(request):
     task_id = request.GET.get("task_id")
-    task_item_list = TaskItem.objects.filter(task=task_id)
+    task = get_object_or_404(
+        Task.objects.for_request(request).only("id", "assignee_id"), pk=task_id
+    )
+    task_item_list = task.taskitem_set.all()
     return render(request, "partials/task_item_list.html" ,{
+        'task': task,
         'task_items' : task_item_list
     })
 
 
+def task_detail(request, task_id=None, update_card=False):
+    """
+    Renders the modal body for a single task. The dashboard task list only sends the slim card
+    markup and loads this partial with HTMX when a card's "View Details" button is clicked. The
+    task actions inside the modal also answer with it (task_id is passed directly then). The
+    comments are only queried when their cached fragment is out of date.
+
+    Actions that change the card's progress pass update_card=True, which adds the task's card as
+    an out-of-band swap. The acting worker's card is then up to date even without the event
+    stream (which only runs under ASGI, see dashboard_events).
+    """
+    if task_id is None:
+        task_id = request.GET.get("task_id")
+    task = get_object_or_404(
+        Task.objects.for_request(request).select_related("shelter", "assignee"), pk=task_id
+    )
+    return render(request, "partials/task_modal.html", {
+        "task": task,
+        "task_items": task.taskitem_set.all(),
+        "comments": task.taskcomment_set.select_related("person"),
+        "update_card": update_card,
+    })
+
+
+def animal_detail(request):
+    """
+    Renders the modal body for a single animal, loaded on demand like task_detail. The modal
+    only shows fields every animal has, and is cached as a whole, so the animal is loaded
+    without the polymorphic upcast and the comments only when the fragment is out of date.
+    """
+    animal_id = request.GET.get("animal_id")
+    animal = get_object_or_404(
+        Animal.objects.for_request(request).non_polymorphic().select_related("shelter"),
+        pk=animal_id,
+    )
+    return render(request, "partials/animal_modal.html", {
+        "animal": animal,
+        "comments": animal.animalcomment_set.select_related("person"),
+    })
+
+
+SEARCH_KIND_LABELS = {
+    "animal": "Animal",
+    "task": "Task",
+    "taskitem": "Task item",
+    "taskcomment": "Comment on task",
+    "animalcomment": "Comment on animal",
+}
+
+
+def search_results(request):
+    """
+    Renders one page of ranked full-text search results for the dashboard search box (GET 'q'
+    and optionally 'page'). Each result opens the task or animal modal it belongs to; the last
+    result of a page is followed by a button that loads the next page in its place. Only the
+    logged-in worker's shelter is searched.
+    """
+    if not request.session.get("is_valid"):
+        return HttpResponse(status=403)
+
+    query = request.GET.get("q", "")
+    page = request.GET.get("page", "1")
+    page = int(page) if page.isdigit() and int(page) > 0 else 1
+
+    hits, has_next = search(query, request.current_worker.shelter_id, page)
+    targets = {
+        "task": Task.objects.for_request(request).in_bulk(
+            {hit.target_id for hit in hits if hit.target_kind == "task"}
+        ),
+        "animal": Animal.objects.for_request(request).for_list().in_bulk(
+            {hit.target_id for hit in hits if hit.target_kind == "animal"}
+        ),
+    }
+    results = []
+    for hit in hits:
+        target = targets[hit.target_kind].get(hit.target_id)
+        if target is not None:
+            results.append(
+                {"hit": hit, "target": target, "label": SEARCH_KIND_LABELS[hit.kind]}
+            )
+
+    return render(request, "partials/search_results.html", {
+        "results": results,
+        "query": query,
+        "page": page,
+        "has_next": has_next,
+    })
+
+
+def _is_htmx(request):
+    return request.headers.get("HX-Request") == "true"
+
+
+def task_card(request, task_id):
+    """
+    Renders the dashboard card of a single task. Cards refetch this when the event stream reports
+    a change to their task, and the card actions (release, pick up) answer with it. A deleted task
+    (or one the worker can't see: another shelter's, or see Task.objects.visible_to()) renders
+    nothing, which removes its card.
+    """
+    task = (
+        Task.objects.for_request(request)
+        .visible_to(request.session.get("is_manager"))
+        .select_related("assignee")
+        .filter(pk=task_id)
+        .first()
+    )
+    if task is None:
+        return HttpResponse("")
+    return render(request, "partials/task_card.html", {"task": task})
+
+
+def animal_card(request, animal_id):
+    """Renders the dashboard card of a single animal, like task_card."""
+    animal = Animal.objects.for_request(request).for_list().filter(pk=animal_id).first()
+    if animal is None:
+        return HttpResponse("")
+    return render(request, "partials/animal_card.html", {"animal": animal})
+
+
+async def dashboard_events(request):
+    """
+    Server-sent event stream for the worker dashboard. Every change to a task or animal is sent
+    as an event named "task-<id>" or "animal-<id>" (see core/events.py), and only the card
+    listening for that event refetches itself, instead of every worker reloading the dashboard.
+
+    Needs an ASGI server (e.g. `uvicorn pawplan.asgi:application`). Under WSGI Django reads an
+    async response to the end before sending it, which an endless stream never reaches, so it
+    answers 204 No Content instead, which tells the browser not to reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    is_valid = await sync_to_async(request.session.get)("is_valid")
+    if not is_valid:
+        return HttpResponse(status=403)
+
+    async def stream():
+        queue = broker.subscribe()
+        try:
+            # Reconnect quickly if the connection drops
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: \n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx and similar proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 def add_worker(request):
     if request.method == "POST":
         form = WorkerForm(request.POST)
@@ -571,7 +755,7 @@ def add_worker(request):
 
 
 def edit_worker(request, worker_id):
-    worker = get_object_or_404(Worker, id=worker_id)
+    worker = get_object_or_404(Worker.objects.for_request(request), id=worker_id)
     if request.method == "POST":
         form = WorkerForm(request.POST, instance=worker)
         if form.is_valid():
@@ -581,3 +765,39 @@ def edit_worker(request, worker_id):
         form = WorkerForm(instance=worker)
 
     return render(request, "edit_worker.html", {"form": form, "worker": worker})
+
+
+def export_data(request, dataset):
+    """
+    Streams one of the EXPORTS datasets as a CSV or JSONL download (GET 'format', default csv).
+    Only the logged-in worker's shelter is exported; 'since'/'until' (dates or ISO datetimes)
+    limit it to a date range. See core/exports.py for the columns and the date each dataset is
+    filtered on.
+    """
+    shelter = request.current_worker.shelter_id
+    if not request.session.get("is_valid") or shelter is None:
+        return HttpResponse(status=403)
+    if dataset not in EXPORTS:
+        raise Http404("Unknown export.")
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        return HttpResponse(f"Unknown format {fmt!r}.", status=400)
+
+    bounds = {}
+    for name in ("since", "until"):
+        value = request.GET.get(name)
+        bounds[name] = _parse_calendar_bound(value)
+        if value and bounds[name] is None:
+            return HttpResponse(f"Invalid date {value!r} for {name!r}.", status=400)
+    return export_response(request, dataset, fmt, shelter=shelter, **bounds)
+
+
+def media_file(request, path):
+    """
+    Serves stored images in development. Their file names contain the hash of the image (see
+    core/media.py), so a URL never points at different content and browsers may keep the file
+    for good.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
@@ -1,8 +1,8 @@
 import datetime
 import random
 
-import requests
 import core.models as m
+from core.image_providers import get_provider
 from django.utils import timezone
 
 
@@ -47,7 +47,8 @@ for name, info in addresses.items():
         info[4],
         info[5],
     )
-    addresses[name] = m.Address.objects.create(
+    # Equivalent addresses share one row (Address.fingerprint is unique)
+    addresses[name], _ = m.Address.objects.get_or_create_normalized(
         street1=street1,
         street2=street2,
         city=city,
@@ -55,7 +56,6 @@ for name, info in addresses.items():
         postal=postal,
         country=country,
     )
-    addresses[name].save()
 
 
 # create a shelter object
@@ -143,19 +143,13 @@ for person in [dr_baliga, steve_p, steve_b, ricky_k, derek_p, connor_h, christos
 
 # Create new animal objects (which will also automatically create Task objects for each)
 
-
-def get_jpg():
-    run = True
-    while run:
-        response = requests.get("https://random.dog/woof.json")
-        img_info = dict(response.json())
-        if img_info.get("url").split(".")[2] == "jpg":
-            return img_info
-
+# Random photos from random.dog (fetched in parallel and cached in .image_cache/), or the
+# bundled images when offline; set PAWPLAN_IMAGES=online/offline to choose
+images = iter(get_provider().images(10))
 
 animal_list = []
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -169,11 +163,12 @@ animal_list.append(
         ready_to_adopt=False,
         shelter=shelter,
         breed="Rotweiler",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Cat.objects.create(
@@ -187,11 +182,12 @@ animal_list.append(
         ready_to_adopt=True,
         shelter=shelter,
         breed="Tabby",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Cat.objects.create(
@@ -205,11 +201,12 @@ animal_list.append(
         ready_to_adopt=False,
         shelter=shelter,
         breed="Tabby",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Turtle.objects.create(
@@ -222,11 +219,12 @@ animal_list.append(
         ready_to_adopt=False,
         shelter=shelter,
         species="Red-eared Slider",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -240,11 +238,12 @@ animal_list.append(
         ready_to_adopt=False,
         shelter=shelter,
         breed="Shepherd Mix",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -258,11 +257,12 @@ animal_list.append(
         ready_to_adopt=False,
         shelter=shelter,
         breed="Maltese",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -276,11 +276,12 @@ animal_list.append(
         ready_to_adopt=True,
         shelter=shelter,
         breed="Terrier Mix",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -294,11 +295,12 @@ animal_list.append(
         ready_to_adopt=True,
         shelter=shelter,
         breed="Shepherd Mix",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -312,11 +314,12 @@ animal_list.append(
         ready_to_adopt=False,
         shelter=shelter,
         breed="Terrier Mix",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
-img_info = get_jpg()
+img_info = next(images)
 
 animal_list.append(
     m.Dog.objects.create(
@@ -330,7 +333,8 @@ animal_list.append(
         ready_to_adopt=True,
         shelter=shelter,
         breed="Maltese",
-        image=img_info.get("url"),
+        image=img_info.url,
+        image_hash=img_info.digest,
     )
 )
 
@@ -364,43 +368,9 @@ feed_cats_task = m.Task.objects.create(
 for task in [clean_toilets_task, post_jobs_task, feed_cats_task]:
     task.save()
 
-task_item_list = []
-
-task_item_list.append(
-    m.TaskItem.objects.create(
-        item_number=1,
-        text="Clean the toilets",
-        is_complete=False,
-        task=clean_toilets_task,
-    )
-)
-
-task_item_list.append(
-    m.TaskItem.objects.create(
-        item_number=1,
-        text="Post available jobs on site one",
-        is_complete=False,
-        task=post_jobs_task,
-    )
-)
-
-task_item_list.append(
-    m.TaskItem.objects.create(
-        item_number=2,
-        text="Post available jobs on site two",
-        is_complete=False,
-        task=post_jobs_task,
-    )
-)
-
-task_item_list.append(
-    m.TaskItem.objects.create(
-        item_number=1, text="Feed the cats", is_complete=False, task=feed_cats_task
-    )
-)
-
-for item in task_item_list:
-    item.save()
+clean_toilets_task.add_items(["Clean the toilets"])
+post_jobs_task.add_items(["Post available jobs on site one", "Post available jobs on site two"])
+feed_cats_task.add_items(["Feed the cats"])
 
 # Add some comments to the animals
 bubba_comment1 = m.AnimalComment.objects.create(
@@ -1,7 +1,7 @@
 import datetime
 
-import requests
 import core.models as m
+from core.image_providers import get_provider
 from django.utils import timezone
 
 
@@ -47,7 +47,8 @@ for name, info in addresses.items():
         info[4],
         info[5],
     )
-    addresses[name] = m.Address.objects.create(
+    # Equivalent addresses share one row (Address.fingerprint is unique)
+    addresses[name], _ = m.Address.objects.get_or_create_normalized(
         street1=street1,
         street2=street2,
         city=city,
@@ -55,7 +56,6 @@ for name, info in addresses.items():
         postal=postal,
         country=country,
     )
-    addresses[name].save()
 
 
 # create a shelter object
@@ -139,10 +139,13 @@ for person in [dr_baliga, steve_p, steve_b, ricky_k, derek_p, connor_h, christos
 
 # Create new animal objects (which will also automatically create AnimalTask objects for each)
 
+# Random photos from random.dog (fetched in parallel and cached in .image_cache/), or the
+# bundled images when offline; set PAWPLAN_IMAGES=online/offline to choose
+images = iter(get_provider().images(10))
+
 animal_list = []
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Bubba",
@@ -155,11 +158,11 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=False,
     shelter=shelter,
     breed="Rotweiler",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Cat.objects.create(
     name="Charlie",
@@ -172,11 +175,11 @@ animal_list.append(m.Cat.objects.create(
     ready_to_adopt=True,
     shelter=shelter,
     breed="Tabby",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Cat.objects.create(
     name="Princess",
@@ -189,11 +192,11 @@ animal_list.append(m.Cat.objects.create(
     ready_to_adopt=False,
     shelter=shelter,
     breed="Tabby",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Turtle.objects.create(
     name="Jennifer",
@@ -205,11 +208,11 @@ animal_list.append(m.Turtle.objects.create(
     ready_to_adopt=False,
     shelter=shelter,
     species="Red-eared Slider",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Larry",
@@ -222,11 +225,11 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=False,
     shelter=shelter,
     breed="Shepherd Mix",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Gadget",
@@ -239,11 +242,11 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=False,
     shelter=shelter,
     breed="Maltese",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Mitra",
@@ -256,11 +259,11 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=True,
     shelter=shelter,
     breed="Terrier Mix",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Rosie",
@@ -273,11 +276,11 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=True,
     shelter=shelter,
     breed="Shepherd Mix",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Hooch",
@@ -290,11 +293,11 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=False,
     shelter=shelter,
     breed="Terrier Mix",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
-response = requests.get('https://random.dog/woof.json')
-img_info = dict(response.json())
+img_info = next(images)
 
 animal_list.append(m.Dog.objects.create(
     name="Ella",
@@ -307,7 +310,8 @@ animal_list.append(m.Dog.objects.create(
     ready_to_adopt=True,
     shelter=shelter,
     breed="Maltese",
-    image= img_info.get('url')
+    image=img_info.url,
+    image_hash=img_info.digest,
 ))
 
 for animal in animal_list:
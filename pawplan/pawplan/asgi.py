@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pawplan.settings')
 
 application = get_asgi_application()
+
+# Serve static files in development like runserver does, so the dashboard (which needs ASGI for
+# its event stream) can be run with `uvicorn pawplan.asgi:application`
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
@@ -50,8 +50,10 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    "core.middleware.QueryTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.middleware.CurrentWorkerMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -63,7 +65,8 @@ ROOT_URLCONF = "pawplan.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # The regular Django backend, plus render timing for QueryTimingMiddleware
+        "BACKEND": "core.instrumentation.InstrumentedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -79,6 +82,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "pawplan.wsgi.application"
 
+# Where QueryTimingMiddleware writes its per-process samples for `manage.py view_metrics`
+VIEW_METRICS_DIR = BASE_DIR / "view_metrics"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -87,10 +93,44 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Seconds to wait for a write lock before failing; the job workers write concurrently
+        # with the web server
+        "OPTIONS": {"timeout": 20},
     }
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Rendered dashboard cards and modals, keyed on version stamps that model signals bump (see
+    # core/fragments.py). LocMemCache evicts the least recently used entries past MAX_ENTRIES.
+    # It is private to each process, which is safe because a fragment is only read under the
+    # current stamps.
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "template-fragments",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # The version stamps, in their own bounded LRU cache so that the generation stamp, which
+    # every fragment reads, is never evicted by rendered markup. They are private to each process
+    # too: a change made by a management command (ingest_images, repair_task_counters) reaches
+    # the server processes when their stamps expire after TIMEOUT seconds. Point this at Redis
+    # or Memcached to share the stamps and make those changes show at once.
+    "fragment_versions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragment-versions",
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -131,6 +171,11 @@ STATICFILES_DIRS = [
     BASE_DIR / "core/static/",
 ]
 
+# Uploaded and fetched animal images and their resized variants (see core/media.py). The file
+# names contain the hash of the image, so they are served as immutable.
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -16,7 +16,7 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from core import views
 from django.conf.urls.static import static
 from core import views
@@ -36,6 +36,7 @@ urlpatterns = [
     path("filter_tasks/", views.filter_tasks, name="filter_tasks"),
     path("sort_tasks/", views.sort_tasks, name="sort_tasks"),
     path("animal/add", views.add_animal, name="add_animal"),
+    path("animal/import", views.import_animals_csv, name="import_animals"),
     path("animal/edit/<int:pet_id>", views.edit_animal, name="edit_animal"),
     path("animal/delete/<int:pet_id>", views.delete_animal, name="delete_animal"),
     path("filter_animals/", views.filter_animals, name="filter_animals"),
@@ -66,6 +67,13 @@ urlpatterns = [
         "display_all_comments/", views.display_all_comments, name="display_all_comments"
     ),
     path("task_items/", views.task_items, name="task_items"),
+    path("task_detail/", views.task_detail, name="task_detail"),
+    path("animal_detail/", views.animal_detail, name="animal_detail"),
+    path("task_card/<int:task_id>", views.task_card, name="task_card"),
+    path("animal_card/<int:animal_id>", views.animal_card, name="animal_card"),
+    path("dashboard/events/", views.dashboard_events, name="dashboard_events"),
+    path("dashboard/search/", views.search_results, name="search_results"),
+    path("export/<str:dataset>/", views.export_data, name="export_data"),
     path("complete_item/<int:item_id>", views.complete_item, name="complete_item"),
     path("swap_task/<int:task_id>", views.swap_task, name="swap_task"),
     path("manage_employees/", views.worker_dash, name="manage_employees"),
@@ -74,3 +82,7 @@ urlpatterns = [
     path("worker/add", views.add_worker, name="add_worker"),
     path("worker/edit/<int:worker_id>", views.edit_worker, name="edit_worker"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+if settings.DEBUG:
+    # In production the web server serves MEDIA_ROOT (with the same Cache-Control header)
+    urlpatterns.append(re_path(r"^media/(?P<path>.*)$", views.media_file, name="media_file"))